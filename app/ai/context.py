@@ -1,34 +1,88 @@
+from collections import OrderedDict
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+import asyncio
+
+from app.ai.conversation_store import ConversationStore, InMemoryConversationStore
+from app.ai.summarizer import ConversationSummarizer
 
 class ConversationManager:
-    def __init__(self):
-        """Initialize conversation manager with in-memory storage"""
-        self.conversations: Dict[str, Dict] = {}
+    def __init__(
+        self,
+        store: Optional[ConversationStore] = None,
+        cache_size: int = 1000,
+        ttl_hours: float = 24,
+        summarizer: Optional[ConversationSummarizer] = None
+    ):
+        """Initialize conversation manager with a backing store and a bounded LRU hot cache"""
+        self.store = store or InMemoryConversationStore()
+        self.cache_size = cache_size
+        self.ttl_hours = ttl_hours
+        self.summarizer = summarizer
+        self.conversations: "OrderedDict[str, Dict]" = OrderedDict()
+        self._summary_tasks: Dict[str, asyncio.Task] = {}
+
+    def _cache(self, conversation_id: str, conversation: Dict) -> Dict:
+        # Messages folded into the summary are no longer needed in memory
+        conversation['history'] = [
+            m for m in conversation['history'] if m['id'] > conversation['summarized_through']
+        ]
+        self.conversations[conversation_id] = conversation
+        self.conversations.move_to_end(conversation_id)
+        while len(self.conversations) > self.cache_size:
+            self.conversations.popitem(last=False)
+        return conversation
+
+    async def _load(self, conversation_id: str) -> Optional[Dict]:
+        """Load a conversation, only fetching messages newer than the cached copy"""
+        cached = self.conversations.get(conversation_id)
+        if cached is None:
+            # The store skips messages already folded into the summary
+            conversation = await self.store.get(conversation_id)
+            return self._cache(conversation_id, conversation) if conversation else None
+
+        # Other workers may have appended since this copy was cached
+        delta = await self.store.get(conversation_id, after_message_id=cached['last_message_id'])
+        if delta is None:
+            self.conversations.pop(conversation_id, None)
+            return None
+        cached['history'].extend(delta['history'])
+        cached.update({
+            'last_message_id': delta['last_message_id'],
+            'last_updated': delta['last_updated'],
+            'user_metadata': delta['user_metadata']
+        })
+        if delta['summarized_through'] > cached['summarized_through']:
+            cached['summary'] = delta['summary']
+            cached['summarized_through'] = delta['summarized_through']
+        return self._cache(conversation_id, cached)
 
     async def create_conversation(self, conversation_id: str) -> Dict:
         """Create a new conversation context"""
-        self.conversations[conversation_id] = {
-            'history': [],
-            'created_at': datetime.now(),
-            'last_updated': datetime.now(),
-            'user_metadata': {}  # Changed from metadata to user_metadata
-        }
-        return self.conversations[conversation_id]
+        conversation = await self.store.create(conversation_id)
+        return self._cache(conversation_id, conversation)
 
     async def get_context(
         self,
         conversation_id: str,
-        max_history: int = 10
+        max_history: Optional[int] = 10
     ) -> Optional[Dict]:
-        """Retrieve conversation context with optional history limit"""
-        conversation = self.conversations.get(conversation_id)
+        """
+        Retrieve conversation context with optional history limit (None returns all messages).
+        
+        Messages already folded into the running summary are replaced by
+        'summary'; 'history' holds only the newer ones.
+        """
+        conversation = await self._load(conversation_id)
         if not conversation:
             return None
             
         # Return recent history while maintaining context
-        history = conversation['history']
-        if len(history) > max_history:
+        history = [
+            {'role': m['role'], 'content': m['content']}
+            for m in conversation['history']
+        ]
+        if max_history is not None and len(history) > max_history:
             # Always include the first system message if it exists
             first_msg = history[0] if history[0]['role'] == 'system' else None
             recent_msgs = history[-max_history:]
@@ -38,7 +92,8 @@ class ConversationManager:
 
         return {
             'history': history,
-            'user_metadata': conversation['user_metadata'],  # Changed from metadata to user_metadata
+            'summary': conversation['summary'],
+            'user_metadata': conversation['user_metadata'],
             'last_updated': conversation['last_updated']
         }
 
@@ -48,38 +103,80 @@ class ConversationManager:
         message: Dict[str, str]
     ) -> Dict:
         """Add a message to the conversation history"""
-        if conversation_id not in self.conversations:
-            await self.create_conversation(conversation_id)
-            
-        conversation = self.conversations[conversation_id]
-        conversation['history'].append(message)
-        conversation['last_updated'] = datetime.now()
+        await self.store.append(conversation_id, message)
+        # Refresh from the store so the cache picks up this and any concurrent appends
+        conversation = await self._load(conversation_id)
+        self._schedule_summary(conversation_id, conversation)
         return conversation
 
+    def _schedule_summary(self, conversation_id: str, conversation: Dict):
+        """Start background summarization when enough turns have accumulated"""
+        if not self.summarizer or conversation_id in self._summary_tasks:
+            return
+        if not self.summarizer.messages_to_fold(conversation['history']):
+            return
+        task = asyncio.create_task(self._summarize(conversation_id))
+        self._summary_tasks[conversation_id] = task
+        task.add_done_callback(lambda _: self._summary_tasks.pop(conversation_id, None))
+
+    async def _summarize(self, conversation_id: str):
+        """Fold aged-out turns into the stored running summary (off the request path)"""
+        try:
+            conversation = await self._load(conversation_id)
+            if not conversation:
+                return
+            to_fold = self.summarizer.messages_to_fold(conversation['history'])
+            if not to_fold:
+                return
+
+            summary = await self.summarizer.summarize(conversation['summary'], to_fold)
+            summarized_through = to_fold[-1]['id']
+            await self.store.save_summary(conversation_id, summary, summarized_through)
+
+            cached = self.conversations.get(conversation_id)
+            if cached and summarized_through > cached['summarized_through']:
+                cached['summary'] = summary
+                cached['summarized_through'] = summarized_through
+                self._cache(conversation_id, cached)
+            print(f"📝 Summarized {len(to_fold)} messages of conversation {conversation_id}")
+        except Exception as e:
+            print(f"Error summarizing conversation {conversation_id}: {str(e)}")
+
     async def update_metadata(
         self,
         conversation_id: str,
-        user_metadata: Dict  # Changed parameter name
+        user_metadata: Dict
     ) -> Dict:
         """Update conversation metadata"""
-        if conversation_id not in self.conversations:
-            raise KeyError("Conversation not found")
-            
-        self.conversations[conversation_id]['user_metadata'].update(user_metadata)  # Changed from metadata to user_metadata
-        self.conversations[conversation_id]['last_updated'] = datetime.now()
-        return self.conversations[conversation_id]
+        await self.store.update_metadata(conversation_id, user_metadata)
+        return await self._load(conversation_id)
 
     async def delete_conversation(self, conversation_id: str):
         """Delete a conversation"""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self.conversations.pop(conversation_id, None)
+        await self.store.delete(conversation_id)
 
-    async def cleanup_old_conversations(self, max_age_hours: int = 24):
+    async def cleanup_old_conversations(self, max_age_hours: Optional[float] = None) -> int:
         """Clean up conversations older than specified hours"""
-        cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
-        to_delete = [
-            conv_id for conv_id, conv in self.conversations.items()
-            if conv['last_updated'] < cutoff_time
-        ]
-        for conv_id in to_delete:
-            await self.delete_conversation(conv_id)
\ No newline at end of file
+        cutoff_time = datetime.utcnow() - timedelta(hours=max_age_hours or self.ttl_hours)
+        deleted = await self.store.delete_older_than(cutoff_time)
+        for conv_id in deleted:
+            self.conversations.pop(conv_id, None)
+        return len(deleted)
+
+    async def close(self):
+        """Cancel in-flight background summaries"""
+        for task in list(self._summary_tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._summary_tasks.values(), return_exceptions=True)
+
+    async def run_sweeper(self, interval_seconds: float = 3600):
+        """Periodically delete conversations idle for longer than the TTL"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                deleted = await self.cleanup_old_conversations()
+                if deleted:
+                    print(f"🧹 Removed {deleted} expired conversations")
+            except Exception as e:
+                print(f"Error in conversation sweeper: {str(e)}")
@@ -0,0 +1,108 @@
+from typing import Callable, Dict, List, Optional
+import math
+
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separator tokens added per chat message
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return math.ceil(len(text) / 4)
+
+class ContextWindowBuilder:
+    """
+    Packs the system prompt, retrieved documents and recent turns into a token budget.
+    
+    The system prompt and the current query are always included. Retrieved
+    documents get up to document_share of what remains, in rank order, and
+    the rest is filled with history from newest to oldest, so the oldest
+    turns are dropped first.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 8192,
+        document_share: float = 0.5,
+        tokenizer: Callable[[str], int] = estimate_tokens
+    ):
+        self.token_budget = token_budget
+        self.document_share = document_share
+        self.tokenizer = tokenizer
+
+    def count_message(self, message: Dict[str, str]) -> int:
+        return self.tokenizer(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Trim text to roughly max_tokens, assuming tokens are spread evenly"""
+        tokens = self.tokenizer(text)
+        if tokens <= max_tokens:
+            return text
+        return text[:int(len(text) * max_tokens / tokens)]
+
+    def build(
+        self,
+        query: str,
+        documents: List[str],
+        history: List[Dict[str, str]],
+        system_message_builder: Callable[[Optional[str]], Dict[str, str]],
+        summary: Optional[str] = None
+    ) -> Dict:
+        """
+        Assemble a prompt within the budget.
+        
+        A running summary of earlier turns, if given, is always included
+        ahead of the history it replaces.
+        
+        Returns:
+            'context' for the system message, 'messages' (kept history plus the
+            query), the 'token_count' of the whole prompt, and how many turns
+            and documents were dropped
+        """
+        query_message = {"role": "user", "content": query}
+        summary_messages = [
+            {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+        ] if summary else []
+        base_tokens = (
+            self.count_message(system_message_builder(None))
+            + self.count_message(query_message)
+            + sum(self.count_message(message) for message in summary_messages)
+        )
+        available = max(0, self.token_budget - base_tokens)
+
+        # Documents, in rank order, up to their share of the budget
+        document_budget = int(available * self.document_share)
+        kept_documents = []
+        used = 0
+        for document in documents:
+            cost = self.tokenizer(document) + 2  # Separator between documents
+            if used + cost > document_budget:
+                remaining = document_budget - used - 2
+                if remaining > 50:
+                    kept_documents.append(self._truncate(document, remaining))
+                    used += remaining + 2
+                break
+            kept_documents.append(document)
+            used += cost
+        context = "\n\n".join(kept_documents)
+        context_tokens = self.tokenizer(context)
+
+        # History, newest first, with whatever budget is left
+        history_budget = available - context_tokens
+        kept_history = []
+        for message in reversed(history):
+            cost = self.count_message(message)
+            if cost > history_budget:
+                break
+            kept_history.insert(0, message)
+            history_budget -= cost
+
+        messages = summary_messages + kept_history + [query_message]
+        token_count = (
+            self.count_message(system_message_builder(context or None))
+            + sum(self.count_message(message) for message in messages)
+        )
+        return {
+            "context": context,
+            "messages": messages,
+            "token_count": token_count,
+            "dropped_turns": len(history) - len(kept_history),
+            "dropped_documents": len(documents) - len(kept_documents)
+        }
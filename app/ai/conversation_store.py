@@ -0,0 +1,263 @@
+from typing import Dict, List, Optional
+from abc import ABC, abstractmethod
+from datetime import datetime
+import asyncio
+
+from app.database import SessionLocal
+from app.models.conversation import ConversationDB, ConversationMessageDB, ConversationSummaryDB
+
+class ConversationStore(ABC):
+    """
+    Storage backend for ConversationManager.
+    
+    Conversations are returned as dicts with 'history' (list of
+    {'id', 'role', 'content'}), 'last_message_id', 'created_at',
+    'last_updated', 'user_metadata', and the rolling 'summary' of messages
+    up to 'summarized_through'. Messages folded into the summary are never
+    returned in 'history', so loading a long conversation only reads the
+    messages since its last summary.
+    """
+
+    @abstractmethod
+    async def create(self, conversation_id: str) -> Dict:
+        """Create the conversation unless it exists, and return it"""
+
+    @abstractmethod
+    async def get(self, conversation_id: str, after_message_id: int = 0) -> Optional[Dict]:
+        """Get a conversation with only the unsummarized messages newer than after_message_id"""
+
+    @abstractmethod
+    async def append(self, conversation_id: str, message: Dict[str, str]) -> int:
+        """Append a message, creating the conversation if needed. Returns the message id."""
+
+    @abstractmethod
+    async def update_metadata(self, conversation_id: str, user_metadata: Dict) -> Dict:
+        """Merge into the conversation's user metadata; raises KeyError if it does not exist"""
+
+    @abstractmethod
+    async def save_summary(self, conversation_id: str, summary: str, summarized_through: int):
+        """Store a running summary unless a newer one covering more messages exists"""
+
+    @abstractmethod
+    async def delete(self, conversation_id: str):
+        """Delete a conversation with its messages and summary"""
+
+    @abstractmethod
+    async def delete_older_than(self, cutoff: datetime) -> List[str]:
+        """Delete conversations not updated since cutoff. Returns the deleted ids."""
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store; history does not survive restarts or span workers"""
+
+    def __init__(self):
+        self.conversations: Dict[str, Dict] = {}
+        self._next_message_id = 1
+
+    def _view(self, conversation: Dict, after_message_id: int) -> Dict:
+        return {
+            'history': [
+                dict(m) for m in conversation['messages']
+                if m['id'] > max(after_message_id, conversation['summarized_through'])
+            ],
+            'last_message_id': conversation['messages'][-1]['id'] if conversation['messages'] else 0,
+            'created_at': conversation['created_at'],
+            'last_updated': conversation['last_updated'],
+            'user_metadata': dict(conversation['user_metadata']),
+            'summary': conversation['summary'],
+            'summarized_through': conversation['summarized_through']
+        }
+
+    async def create(self, conversation_id: str) -> Dict:
+        if conversation_id not in self.conversations:
+            now = datetime.utcnow()
+            self.conversations[conversation_id] = {
+                'messages': [],
+                'created_at': now,
+                'last_updated': now,
+                'user_metadata': {},
+                'summary': None,
+                'summarized_through': 0
+            }
+        return self._view(self.conversations[conversation_id], 0)
+
+    async def get(self, conversation_id: str, after_message_id: int = 0) -> Optional[Dict]:
+        conversation = self.conversations.get(conversation_id)
+        return self._view(conversation, after_message_id) if conversation else None
+
+    async def append(self, conversation_id: str, message: Dict[str, str]) -> int:
+        await self.create(conversation_id)
+        conversation = self.conversations[conversation_id]
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        conversation['messages'].append({'id': message_id, 'role': message['role'], 'content': message['content']})
+        conversation['last_updated'] = datetime.utcnow()
+        return message_id
+
+    async def update_metadata(self, conversation_id: str, user_metadata: Dict) -> Dict:
+        if conversation_id not in self.conversations:
+            raise KeyError("Conversation not found")
+        conversation = self.conversations[conversation_id]
+        conversation['user_metadata'].update(user_metadata)
+        conversation['last_updated'] = datetime.utcnow()
+        return self._view(conversation, 0)
+
+    async def save_summary(self, conversation_id: str, summary: str, summarized_through: int):
+        conversation = self.conversations.get(conversation_id)
+        if conversation and summarized_through > conversation['summarized_through']:
+            conversation['summary'] = summary
+            conversation['summarized_through'] = summarized_through
+
+    async def delete(self, conversation_id: str):
+        self.conversations.pop(conversation_id, None)
+
+    async def delete_older_than(self, cutoff: datetime) -> List[str]:
+        to_delete = [
+            conv_id for conv_id, conv in self.conversations.items()
+            if conv['last_updated'] < cutoff
+        ]
+        for conv_id in to_delete:
+            del self.conversations[conv_id]
+        return to_delete
+
+class SQLConversationStore(ConversationStore):
+    """Database-backed store shared by all workers; messages are append-only rows"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def _view(self, db, conversation: ConversationDB, after_message_id: int) -> Dict:
+        # Read the summary first so messages it already covers are not loaded
+        summary = db.get(ConversationSummaryDB, conversation.id)
+        after_message_id = max(after_message_id, summary.summarized_through if summary else 0)
+        messages = (
+            db.query(ConversationMessageDB)
+            .filter(
+                ConversationMessageDB.conversation_id == conversation.id,
+                ConversationMessageDB.id > after_message_id
+            )
+            .order_by(ConversationMessageDB.id)
+            .all()
+        )
+        return {
+            'history': [{'id': m.id, 'role': m.role, 'content': m.content} for m in messages],
+            'last_message_id': messages[-1].id if messages else after_message_id,
+            'created_at': conversation.created_at,
+            'last_updated': conversation.last_updated,
+            'user_metadata': dict(conversation.user_metadata or {}),
+            'summary': summary.summary if summary else None,
+            'summarized_through': summary.summarized_through if summary else 0
+        }
+
+    def _get_or_create(self, db, conversation_id: str) -> ConversationDB:
+        conversation = db.get(ConversationDB, conversation_id)
+        if conversation is None:
+            conversation = ConversationDB(id=conversation_id, history=[], user_metadata={})
+            db.add(conversation)
+            db.flush()
+        return conversation
+
+    def _create(self, conversation_id: str) -> Dict:
+        with self.session_factory() as db:
+            conversation = self._get_or_create(db, conversation_id)
+            db.commit()
+            return self._view(db, conversation, 0)
+
+    def _get(self, conversation_id: str, after_message_id: int) -> Optional[Dict]:
+        with self.session_factory() as db:
+            conversation = db.get(ConversationDB, conversation_id)
+            return self._view(db, conversation, after_message_id) if conversation else None
+
+    def _append(self, conversation_id: str, message: Dict[str, str]) -> int:
+        with self.session_factory() as db:
+            conversation = self._get_or_create(db, conversation_id)
+            row = ConversationMessageDB(
+                conversation_id=conversation_id,
+                role=message['role'],
+                content=message['content']
+            )
+            db.add(row)
+            conversation.last_updated = datetime.utcnow()
+            db.commit()
+            return row.id
+
+    def _update_metadata(self, conversation_id: str, user_metadata: Dict) -> Dict:
+        with self.session_factory() as db:
+            conversation = db.get(ConversationDB, conversation_id)
+            if conversation is None:
+                raise KeyError("Conversation not found")
+            # Reassign so SQLAlchemy detects the JSON change
+            conversation.user_metadata = {**(conversation.user_metadata or {}), **user_metadata}
+            conversation.last_updated = datetime.utcnow()
+            db.commit()
+            return self._view(db, conversation, 0)
+
+    def _save_summary(self, conversation_id: str, summary: str, summarized_through: int):
+        with self.session_factory() as db:
+            row = db.get(ConversationSummaryDB, conversation_id)
+            if row is None:
+                db.add(ConversationSummaryDB(
+                    conversation_id=conversation_id,
+                    summary=summary,
+                    summarized_through=summarized_through
+                ))
+            elif summarized_through > row.summarized_through:
+                row.summary = summary
+                row.summarized_through = summarized_through
+            db.commit()
+
+    def _delete_ids(self, db, conversation_ids: List[str]):
+        db.query(ConversationSummaryDB).filter(
+            ConversationSummaryDB.conversation_id.in_(conversation_ids)
+        ).delete(synchronize_session=False)
+        db.query(ConversationMessageDB).filter(
+            ConversationMessageDB.conversation_id.in_(conversation_ids)
+        ).delete(synchronize_session=False)
+        db.query(ConversationDB).filter(
+            ConversationDB.id.in_(conversation_ids)
+        ).delete(synchronize_session=False)
+
+    def _delete(self, conversation_id: str):
+        with self.session_factory() as db:
+            self._delete_ids(db, [conversation_id])
+            db.commit()
+
+    def _delete_older_than(self, cutoff: datetime) -> List[str]:
+        with self.session_factory() as db:
+            ids = [
+                row.id for row in
+                db.query(ConversationDB.id).filter(ConversationDB.last_updated < cutoff).all()
+            ]
+            if ids:
+                self._delete_ids(db, ids)
+                db.commit()
+            return ids
+
+    # Sessions are synchronous, so run them off the event loop
+    async def create(self, conversation_id: str) -> Dict:
+        return await asyncio.to_thread(self._create, conversation_id)
+
+    async def get(self, conversation_id: str, after_message_id: int = 0) -> Optional[Dict]:
+        return await asyncio.to_thread(self._get, conversation_id, after_message_id)
+
+    async def append(self, conversation_id: str, message: Dict[str, str]) -> int:
+        return await asyncio.to_thread(self._append, conversation_id, message)
+
+    async def update_metadata(self, conversation_id: str, user_metadata: Dict) -> Dict:
+        return await asyncio.to_thread(self._update_metadata, conversation_id, user_metadata)
+
+    async def save_summary(self, conversation_id: str, summary: str, summarized_through: int):
+        await asyncio.to_thread(self._save_summary, conversation_id, summary, summarized_through)
+
+    async def delete(self, conversation_id: str):
+        await asyncio.to_thread(self._delete, conversation_id)
+
+    async def delete_older_than(self, cutoff: datetime) -> List[str]:
+        return await asyncio.to_thread(self._delete_older_than, cutoff)
+
+def create_conversation_store(kind: str) -> ConversationStore:
+    """Create the conversation store selected by CONVERSATION_STORE"""
+    if kind == "sql":
+        return SQLConversationStore()
+    if kind == "memory":
+        return InMemoryConversationStore()
+    raise ValueError(f"Unknown CONVERSATION_STORE: {kind}")
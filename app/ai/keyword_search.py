@@ -0,0 +1,95 @@
+from typing import Dict, List, Tuple
+import math
+import re
+
+# Words that carry no meaning in a program search, including ones every
+# program title or search template shares
+STOPWORDS = frozenset({
+    "a", "about", "an", "and", "any", "are", "areas", "as", "at", "background", "be", "best", "by",
+    "can", "could", "do", "does", "find", "for", "from", "good", "has", "have", "how", "i", "im",
+    "in", "interested", "interests", "is", "it", "locations", "looking", "me", "my", "of", "on",
+    "or", "our", "preferred", "program", "programs", "recommend", "some", "student", "students",
+    "that", "the", "their", "there", "these", "this", "to", "type", "was", "we", "what", "which",
+    "who", "with", "would", "you", "your"
+})
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens for keyword matching"""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def query_terms(query: str) -> List[str]:
+    """Distinct query tokens worth matching: stopwords and single characters are dropped"""
+    return [term for term in dict.fromkeys(tokenize(query)) if len(term) > 1 and term not in STOPWORDS]
+
+def bm25_scores(
+    query: str,
+    documents: List[str],
+    k1: float = 1.5,
+    b: float = 0.75
+) -> List[float]:
+    """Okapi BM25 score of each document for the query, with IDF over the given documents"""
+    terms = set(query_terms(query))
+    doc_tokens = [tokenize(document) for document in documents]
+    if not terms or not doc_tokens:
+        return [0.0] * len(documents)
+
+    n_docs = len(doc_tokens)
+    avg_len = sum(len(tokens) for tokens in doc_tokens) / n_docs or 1.0
+    doc_freq = {
+        term: sum(1 for tokens in doc_tokens if term in tokens)
+        for term in terms
+    }
+
+    scores = []
+    for tokens in doc_tokens:
+        score = 0.0
+        for term in terms:
+            tf = tokens.count(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avg_len))
+        scores.append(score)
+    return scores
+
+class TitleIndex:
+    """
+    BM25 over every program title, with an inverted index.
+
+    Finds the programs whose names match a query regardless of where they
+    rank by vector similarity; IDF is computed over the whole collection.
+    """
+
+    def __init__(self, ids: List[str], titles: List[str], k1: float = 1.5, b: float = 0.75):
+        self.ids = ids
+        self.k1 = k1
+        self.b = b
+        self.lengths = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for position, title in enumerate(titles):
+            tokens = tokenize(title)
+            self.lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self.postings.setdefault(token, []).append((position, tf))
+        self.avg_len = sum(self.lengths) / len(self.lengths) if self.lengths else 1.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """Best-scoring (id, score) pairs for titles containing a query term"""
+        scores: Dict[int, float] = {}
+        n_docs = len(self.ids)
+        for term in query_terms(query):
+            postings = self.postings.get(term, [])
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, tf in postings:
+                norm = 1 - self.b + self.b * self.lengths[position] / (self.avg_len or 1.0)
+                scores[position] = scores.get(position, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(self.ids[position], score) for position, score in best]
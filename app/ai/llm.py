@@ -1,14 +1,171 @@
-import os
-from groq import Groq
-from typing import List, Dict, Optional
+import asyncio
+from typing import AsyncIterator, List, Dict, Optional
+from app.config import settings
 
-class LLMService:
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
+class GroqBackend:
+    """Async Groq client sharing one pooled HTTP connection per worker"""
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        max_connections: int = 20,
+        timeout: float = 60.0,
+        max_retries: int = 2
+    ):
         if not api_key:
             raise ValueError("GROQ_API_KEY environment variable is not set")
-        self.client = Groq(api_key=api_key)
-        self.model = "mixtral-8x7b-32768"
+        # Imported here so the app (and the local backend) load without the Groq SDK
+        import httpx
+        from groq import AsyncGroq
+
+        self.model = model
+        self.calls = 0
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=timeout
+        )
+        self.client = AsyncGroq(
+            api_key=api_key,
+            http_client=self.http_client,
+            timeout=timeout,
+            max_retries=max_retries
+        )
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Run a single chat completion"""
+        self.calls += 1
+        chat_completion = await self.client.chat.completions.create(
+            messages=messages,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=1
+        )
+        return chat_completion.choices[0].message.content
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncIterator[str]:
+        """Run a chat completion, yielding content tokens as they arrive"""
+        self.calls += 1
+        stream = await self.client.chat.completions.create(
+            messages=messages,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=1,
+            stream=True
+        )
+        async for chunk in stream:
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if token:
+                yield token
+
+    async def aclose(self):
+        """Close the pooled HTTP connection"""
+        await self.http_client.aclose()
+
+class LocalBackend:
+    """Network-free stand-in backend for local development and load testing"""
+
+    def __init__(self, latency_seconds: float = 0.5, model: str = "local-echo"):
+        self.model = model
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Simulate a completion by echoing the last user message after a delay"""
+        self.calls += 1
+        await asyncio.sleep(self.latency_seconds)
+        last_user = next(
+            (m["content"] for m in reversed(messages) if m["role"] == "user"),
+            ""
+        )
+        return f"[{self.model}] {last_user[:200]}"
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncIterator[str]:
+        """Simulate a streamed completion, spreading the delay across tokens"""
+        self.calls += 1
+        last_user = next(
+            (m["content"] for m in reversed(messages) if m["role"] == "user"),
+            ""
+        )
+        tokens = f"[{self.model}] {last_user[:200]}".split(" ")
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(self.latency_seconds / len(tokens))
+            yield token if i == 0 else f" {token}"
+
+    async def aclose(self):
+        pass
+
+def create_backend():
+    """Create the LLM backend selected by LLM_BACKEND"""
+    if settings.LLM_BACKEND == "local":
+        return LocalBackend(latency_seconds=settings.LLM_LOCAL_LATENCY_SECONDS)
+    if settings.LLM_BACKEND == "groq":
+        return GroqBackend(
+            api_key=settings.GROQ_API_KEY,
+            model=settings.LLM_MODEL,
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES
+        )
+    raise ValueError(f"Unknown LLM_BACKEND: {settings.LLM_BACKEND}")
+
+class LLMService:
+    def __init__(
+        self,
+        backend=None,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        timeout: float = settings.LLM_TIMEOUT_SECONDS
+    ):
+        self.backend = backend or create_backend()
+        self.model = self.backend.model
+        self.timeout = timeout
+        # Bound in-flight completions so a burst of requests queues here
+        # instead of exhausting the connection pool
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def close(self):
+        """Release the backend's HTTP resources"""
+        await self.backend.aclose()
+
+    def build_system_message(self, context: Optional[str] = None) -> Dict[str, str]:
+        """Build the assistant system message, embedding RAG context if provided"""
+        return {
+            "role": "system",
+            "content": f"""You are a graduate program admissions assistant. 
+            Your goal is to help students find and apply to suitable graduate programs.
+            {f'Use this context when relevant: {context}' if context else ''}
+            
+            Guidelines:
+            - Provide specific, actionable advice
+            - Be clear about admission requirements and deadlines
+            - If unsure about specific details, say so
+            - Maintain a professional but encouraging tone"""
+        }
 
     async def generate_response(
         self,
@@ -17,7 +174,7 @@ class LLMService:
         temperature: float = 0.7
     ) -> str:
         """
-        Generate a response using the Groq LLM.
+        Generate a response using the configured LLM backend.
         
         Args:
             messages: List of conversation messages
@@ -25,35 +182,66 @@ class LLMService:
             temperature: Controls randomness in generation
         """
         try:
-            # Prepare system message with context if provided
-            system_message = {
-                "role": "system",
-                "content": f"""You are a graduate program admissions assistant. 
-                Your goal is to help students find and apply to suitable graduate programs.
-                {f'Use this context when relevant: {context}' if context else ''}
-                
-                Guidelines:
-                - Provide specific, actionable advice
-                - Be clear about admission requirements and deadlines
-                - If unsure about specific details, say so
-                - Maintain a professional but encouraging tone"""
-            }
-
-            # Generate completion
-            chat_completion = self.client.chat.completions.create(
-                messages=[system_message] + messages,
-                model=self.model,
-                temperature=temperature,
-                max_tokens=1024,
-                top_p=1
-            )
+            system_message = self.build_system_message(context)
 
-            return chat_completion.choices[0].message.content
+            # Generate completion without blocking the event loop
+            async with self._semaphore:
+                return await asyncio.wait_for(
+                    self.backend.complete(
+                        messages=[system_message] + messages,
+                        temperature=temperature,
+                        max_tokens=1024
+                    ),
+                    timeout=self.timeout
+                )
 
+        except asyncio.TimeoutError:
+            print(f"LLM response timed out after {self.timeout}s")
+            raise
         except Exception as e:
             print(f"Error generating LLM response: {str(e)}")
             raise
 
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        context: Optional[str] = None,
+        temperature: float = 0.7
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response token by token using the configured LLM backend.
+        
+        The per-request timeout applies to the whole stream, not each token.
+        """
+        system_message = self.build_system_message(context)
+        loop = asyncio.get_running_loop()
+
+        async with self._semaphore:
+            deadline = loop.time() + self.timeout
+            tokens = self.backend.stream(
+                messages=[system_message] + messages,
+                temperature=temperature,
+                max_tokens=1024
+            )
+            try:
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        token = await asyncio.wait_for(tokens.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    yield token
+            except asyncio.TimeoutError:
+                print(f"LLM stream timed out after {self.timeout}s")
+                raise
+            except Exception as e:
+                print(f"Error streaming LLM response: {str(e)}")
+                raise
+            finally:
+                await tokens.aclose()
+
     async def generate_program_recommendation(
         self,
         student_profile: Dict,
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import re
+import time
+
+def normalize_query(query: str) -> str:
+    """Normalize query text so trivially different phrasings share a cache entry"""
+    text = re.sub(r"[^\w\s$.,-]", " ", query.lower())
+    return re.sub(r"\s+", " ", text).strip(" .,")
+
+class QueryCache:
+    """In-process LRU cache of retrieval results with a TTL, invalidated on index writes"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._generation: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def _sync_generation(self, generation: int):
+        # Any write to the index bumps its generation and drops every entry
+        if generation != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        self._sync_generation(generation)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, generation: int):
+        # Results computed before a write landed are already stale
+        if self._generation is not None and generation < self._generation:
+            return
+        self._sync_generation(generation)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "entries": len(self._entries),
+            "invalidations": self.invalidations
+        }
@@ -1,29 +1,52 @@
 from typing import Dict, List, Optional
-from app.ai.vector_store import VectorStore
+from app.ai.vector_store import SearchFilters, VectorStore
 from app.ai.llm import LLMService
+from app.ai.query_cache import QueryCache, normalize_query
+from app.config import settings
 
 class RAGManager:
-    def __init__(self):
-        self.vector_store = VectorStore()
-        self.llm_service = LLMService()
+    def __init__(self, vector_store: VectorStore, llm_service: LLMService):
+        self.vector_store = vector_store
+        self.llm_service = llm_service
+        self.query_cache = QueryCache(
+            max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS
+        )
         
     async def initialize(self):
         """Initialize the RAG system"""
-        await self.vector_store.initialize()
-        
-    async def get_rag_response(
+        await self.vector_store.ensure_initialized()
+
+    async def retrieve_context(
         self,
         query: str,
-        conversation_context: Optional[List[Dict]] = None,
-        n_results: int = 5
+        n_results: int = 5,
+        filters: Optional[SearchFilters] = None,
+        keyword_query: Optional[str] = None
     ) -> Dict:
-        """Get RAG-enhanced response"""
+        """
+        Retrieve relevant programs and build LLM context without generating a response.
+
+        keyword_query, if given, replaces the query for title keyword matching.
+        """
         try:
-            # Search for relevant programs
-            matches = await self.vector_store.search_similar(
-                query=query,
-                n_results=n_results
+            # Search for relevant programs, reusing cached results for hot queries
+            cache_key = (
+                normalize_query(query),
+                n_results,
+                filters.cache_key() if filters else None,
+                normalize_query(keyword_query) if keyword_query is not None else None
             )
+            generation = self.vector_store.generation
+            matches = self.query_cache.get(cache_key, generation)
+            if matches is None:
+                matches = await self.vector_store.search_similar(
+                    query=query,
+                    n_results=n_results,
+                    filters=filters,
+                    keyword_query=keyword_query
+                )
+                self.query_cache.put(cache_key, matches, generation)
             
             # Extract program information
             relevant_programs = []
@@ -35,28 +58,49 @@ class RAGManager:
                     "name": metadata.get("name", "Unknown Program"),
                     "university": metadata.get("university", "Unknown University"),
                     "department": metadata.get("department", "Unknown Department"),
-                    "similarity": match.get("similarity", None)
+                    "location": metadata.get("location"),
+                    "similarity": match.get("similarity", None),
+                    "score": match.get("score", None)
                 })
                 context_texts.append(match["document"])
                 
             # Create context for LLM
             context = "\n\n".join(context_texts) if context_texts else ""
             
+            return {
+                "relevant_programs": relevant_programs,
+                "documents": context_texts,
+                "context": context
+            }
+            
+        except Exception as e:
+            print(f"Error in RAG context retrieval: {str(e)}")
+            raise
+        
+    async def get_rag_response(
+        self,
+        query: str,
+        conversation_context: Optional[List[Dict]] = None,
+        n_results: int = 5
+    ) -> Dict:
+        """Get RAG-enhanced response"""
+        try:
+            retrieved = await self.retrieve_context(query=query, n_results=n_results)
+            
             # Generate response using LLM with context
-            messages = conversation_context or []
+            messages = list(conversation_context or [])
             messages.append({"role": "user", "content": query})
             
             response = await self.llm_service.generate_response(
                 messages=messages,
-                context=context
+                context=retrieved["context"]
             )
             
             return {
                 "response": response,
-                "relevant_programs": relevant_programs,
-                "context": context
+                **retrieved
             }
             
         except Exception as e:
             print(f"Error in RAG response generation: {str(e)}")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,42 @@
+from typing import Dict, List, Optional
+from app.ai.llm import LLMService
+
+class ConversationSummarizer:
+    """Folds turns that have aged out of the verbatim window into a running summary"""
+
+    def __init__(
+        self,
+        llm_service: LLMService,
+        trigger_messages: int = 20,
+        keep_recent: int = 10
+    ):
+        self.llm_service = llm_service
+        # Summarize once more than trigger_messages are unsummarized, folding
+        # all but the keep_recent newest into the summary
+        self.trigger_messages = trigger_messages
+        self.keep_recent = keep_recent
+
+    def messages_to_fold(self, unsummarized: List[Dict]) -> List[Dict]:
+        """Messages to fold now, or an empty list if the conversation is still short"""
+        if len(unsummarized) <= self.trigger_messages:
+            return []
+        return unsummarized[:len(unsummarized) - self.keep_recent]
+
+    async def summarize(self, previous_summary: Optional[str], messages: List[Dict]) -> str:
+        """Produce an updated summary covering the previous summary plus the new messages"""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = f"""Update the running summary of an advising conversation with a student.
+
+        Current summary:
+        {previous_summary or '(none yet)'}
+
+        New messages:
+        {transcript}
+
+        Write the updated summary in under 200 words. Keep the student's background,
+        interests, preferences, constraints, programs discussed and any open questions."""
+
+        return await self.llm_service.generate_response(
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2
+        )
@@ -1,31 +1,119 @@
-import chromadb
+import asyncio
 from typing import List, Dict, Optional
 import json
+import hashlib
+import math
+import time
 from datetime import datetime
+from pydantic import BaseModel
+from app.config import settings
+from app.ai.keyword_search import TitleIndex, bm25_scores
+
+class SearchFilters(BaseModel):
+    """Structured program filters pushed down to Chroma as a where clause"""
+    states: Optional[List[str]] = None  # Two-letter state codes
+    degree_levels: Optional[List[int]] = None  # Scorecard credential levels, e.g. 5=Master's, 6=Doctoral
+    max_annual_cost: Optional[float] = None
+    min_admission_rate: Optional[float] = None
+
+    def to_where(self) -> Optional[Dict]:
+        """Build the Chroma where clause, or None if no filter is set"""
+        clauses = []
+        if self.states:
+            clauses.append({"state": {"$in": [state.upper() for state in self.states]}})
+        if self.degree_levels:
+            clauses.append({"degree_level": {"$in": list(self.degree_levels)}})
+        if self.max_annual_cost is not None:
+            clauses.append({"annual_cost": {"$lte": self.max_annual_cost}})
+        if self.min_admission_rate is not None:
+            clauses.append({"admission_rate": {"$gte": self.min_admission_rate}})
+
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def cache_key(self) -> str:
+        return self.model_dump_json(exclude_none=True)
 
 class VectorStore:
+    # Bump when create_program_document or create_program_metadata change, so
+    # indexes built with the old format are rebuilt
+    DOCUMENT_FORMAT_VERSION = 1
+
     def __init__(self):
+        # chromadb is slow to import; load it when the store is created, not with the app
+        import chromadb
+        from app.ai.embedding_cache import CachedEmbeddingFunction, EmbeddingCache
+
         self.client = chromadb.PersistentClient(path="./chroma_db")
         self.collection_name = "programs"
         self.collection = None
+        self.warm = False
+        # Bumped on every write so retrieval caches can invalidate themselves
+        self.generation = 0
+        # Program titles for keyword candidates, rebuilt after writes or QUERY_CACHE_TTL_SECONDS
+        self._title_index: Optional[TitleIndex] = None
+        self._title_index_key = None
+        self._title_index_loaded_at = 0.0
+        self.embedding_cache = EmbeddingCache(
+            path=settings.EMBEDDING_CACHE_PATH,
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+        )
+        self.embedding_function = CachedEmbeddingFunction(
+            cache=self.embedding_cache,
+            model_name=settings.EMBEDDING_MODEL_NAME
+        )
         
     async def ensure_initialized(self):
         """Ensure the collection is initialized before use"""
         if self.collection is None:
             await self.initialize()
             
-    async def initialize(self):
+    async def initialize(self, collection_name: Optional[str] = None):
         """Initialize or get the collection"""
         try:
-            self.collection = self.client.get_or_create_collection(
-                name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
-            print("✅ Vector store initialized")
+            if collection_name:
+                self.collection_name = collection_name
+            self.collection = self.open_collection(self.collection_name)
+            print(f"✅ Vector store initialized ({self.collection_name})")
         except Exception as e:
             print(f"❌ Vector store initialization failed: {str(e)}")
             raise
 
+    def open_collection(self, name: str):
+        """Get or create a program collection with this store's embedding function"""
+        return self.client.get_or_create_collection(
+            name=name,
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=self.embedding_function
+        )
+
+    async def use_collection(self, name: str):
+        """Switch reads and writes to another collection in one step"""
+        collection = await asyncio.to_thread(self.open_collection, name)
+        # A single assignment: a request sees either the old or the new collection
+        self.collection, self.collection_name = collection, name
+        self.generation += 1
+        print(f"✅ Vector store switched to {name}")
+
+    async def drop_collection(self, name: str):
+        """Delete a collection that is not in use"""
+        if name == self.collection_name:
+            raise ValueError(f"Cannot drop the active collection {name}")
+        try:
+            await asyncio.to_thread(self.client.delete_collection, name)
+        except ValueError:
+            # Already gone
+            pass
+
+    async def warm_up(self) -> int:
+        """Open the collection and load the embedding model so the first query is fast. Returns the program count."""
+        await self.ensure_initialized()
+        await asyncio.to_thread(self.embedding_function.warm_up)
+        count = await asyncio.to_thread(self.collection.count)
+        self.warm = True
+        return count
+
     def create_program_document(self, program: Dict) -> str:
         """Create a searchable document from program data"""
         return f"""
@@ -41,97 +129,288 @@ class VectorStore:
         """
 
     def create_program_metadata(self, program: Dict) -> Dict:
-        """Create metadata for program"""
-        return {
+        """Create metadata for program, including the numeric fields used by search filters"""
+        requirements = program.get('requirements', {})
+        location = program.get('location', 'Unknown')
+        metadata = {
             "program_id": str(program['id']),
             "name": program['name'],
             "university": program['university'],
             "department": program['department'],
-            "location": program.get('location', 'Unknown'),
-            "degree_type": program.get('requirements', {}).get('degree_type', 'Graduate Degree'),
-            "last_updated": datetime.utcnow().isoformat()
+            "location": location,
+            "state": program.get('state') or location.rsplit(", ", 1)[-1],
+            "degree_type": requirements.get('degree_type', 'Graduate Degree'),
+            "degree_level": requirements.get('degree_level'),
+            "annual_cost": requirements.get('annual_cost'),
+            "admission_rate": requirements.get('admission_rate')
         }
+        # Chroma metadata values cannot be None
+        return {key: value for key, value in metadata.items() if value is not None}
+
+    def compute_content_hash(self, document: str, metadata: Dict) -> str:
+        """Hash the rendered document and metadata to detect content changes"""
+        payload = json.dumps({"document": document, "metadata": metadata}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def program_content_hash(self, program: Dict) -> str:
+        """Content hash a program would be stored with"""
+        return self.compute_content_hash(
+            self.create_program_document(program),
+            self.create_program_metadata(program)
+        )
 
     async def add_or_update_program(self, program: Dict) -> bool:
         """Add or update a program in the vector store. Returns True if new, False if updated."""
+        counts = await self.upsert_programs([program])
+        return counts["new"] == 1
+
+    async def upsert_programs(
+        self,
+        programs: List[Dict],
+        batch_size: Optional[int] = None,
+        collection=None
+    ) -> Dict[str, int]:
+        """
+        Add or update programs in batches, skipping unchanged ones.
+        
+        Each batch does one lookup of the stored content hashes and one upsert
+        of the new and changed programs, so only those are re-embedded.
+        Writes go to the active collection unless another one is given.
+        
+        Returns:
+            Counts of new, changed and unchanged programs
+        """
         await self.ensure_initialized()
+        collection = collection or self.collection
+        batch_size = batch_size or settings.VECTOR_UPSERT_BATCH_SIZE
         
+        # Chroma rejects duplicate ids within a call; the last occurrence wins
+        unique = {str(program['id']): program for program in programs}
+        items = list(unique.items())
+        
+        counts = {"new": 0, "changed": 0, "unchanged": 0}
         try:
-            program_id = str(program['id'])
-            document = self.create_program_document(program)
-            metadata = self.create_program_metadata(program)
-
-            # Check if program exists
-            existing = self.collection.get(
-                ids=[program_id],
-                include=['metadatas']
-            )
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
 
-            if existing and existing['ids']:
-                # Update existing program
-                self.collection.update(
-                    ids=[program_id],
-                    documents=[document],
-                    metadatas=[metadata]
+                # Chroma calls run in a thread so embedding does not block the event loop
+                existing = await asyncio.to_thread(
+                    collection.get,
+                    ids=[program_id for program_id, _ in batch],
+                    include=['metadatas']
                 )
-                print(f"Updated existing program: {program['name']} at {program['university']}")
-                return False
-            else:
-                # Add new program
-                self.collection.add(
-                    documents=[document],
-                    metadatas=[metadata],
-                    ids=[program_id]
-                )
-                print(f"Added new program: {program['name']} at {program['university']}")
-                return True
+                stored_hashes = {
+                    program_id: (metadata or {}).get("content_hash")
+                    for program_id, metadata in zip(existing['ids'], existing['metadatas'])
+                }
+
+                ids, documents, metadatas = [], [], []
+                now = datetime.utcnow().isoformat()
+                for program_id, program in batch:
+                    document = self.create_program_document(program)
+                    metadata = self.create_program_metadata(program)
+                    content_hash = self.compute_content_hash(document, metadata)
+
+                    if program_id not in stored_hashes:
+                        counts["new"] += 1
+                    elif stored_hashes[program_id] == content_hash:
+                        counts["unchanged"] += 1
+                        continue
+                    else:
+                        counts["changed"] += 1
+
+                    ids.append(program_id)
+                    documents.append(document)
+                    metadatas.append({**metadata, "content_hash": content_hash, "last_updated": now})
+
+                if ids:
+                    await asyncio.to_thread(
+                        collection.upsert,
+                        ids=ids,
+                        documents=documents,
+                        metadatas=metadatas
+                    )
+                    if collection is self.collection:
+                        self.generation += 1
+                print(f"Processed batch of {len(batch)} programs ({len(ids)} written, {len(batch) - len(ids)} unchanged)")
+
+            return counts
 
         except Exception as e:
-            print(f"Error in add_or_update_program: {str(e)}")
+            print(f"Error in upsert_programs: {str(e)}")
+            raise
+
+    async def delete_programs(self, program_ids: List[str], collection=None) -> int:
+        """Delete programs by id; ids not in the store are ignored."""
+        await self.ensure_initialized()
+        collection = collection or self.collection
+        if not program_ids:
+            return 0
+        
+        try:
+            await asyncio.to_thread(collection.delete, ids=list(program_ids))
+            if collection is self.collection:
+                self.generation += 1
+            return len(program_ids)
+        except Exception as e:
+            print(f"Error deleting programs: {str(e)}")
+            raise
+
+    async def get_program_ids(self, collection=None) -> List[str]:
+        """Get the ids of all programs in the store."""
+        await self.ensure_initialized()
+        collection = collection or self.collection
+        
+        try:
+            return (await asyncio.to_thread(collection.get, include=[]))['ids']
+        except Exception as e:
+            print(f"Error getting program ids: {str(e)}")
+            raise
+
+    async def get_content_hashes(self) -> Dict[str, Optional[str]]:
+        """Map every stored program id to its content hash, without loading documents."""
+        await self.ensure_initialized()
+        
+        try:
+            results = await asyncio.to_thread(self.collection.get, include=['metadatas'])
+            return {
+                program_id: (metadata or {}).get("content_hash")
+                for program_id, metadata in zip(results['ids'], results['metadatas'])
+            }
+        except Exception as e:
+            print(f"Error getting content hashes: {str(e)}")
             raise
 
     async def search_similar(
         self,
         query: str,
-        n_results: int = 5
+        n_results: int = 5,
+        filters: Optional[SearchFilters] = None,
+        keyword_query: Optional[str] = None
     ) -> List[Dict]:
-        """Search for similar programs."""
+        """
+        Search for similar programs.
+        
+        Structured filters are applied inside Chroma, so every returned slot
+        matches them. The nearest vector hits are merged with the programs
+        whose titles best match keyword_query (default: the query), so a
+        strong title match is found even if it is not among the vector hits,
+        and the merged candidates are re-ranked by a blend of vector
+        similarity and a BM25 keyword score over program titles.
+        """
         await self.ensure_initialized()
         
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=min(n_results, 20)  # Limit maximum results
+            n_results = min(n_results, 20)  # Limit maximum results
+            where = filters.to_where() if filters else None
+            keyword_query = keyword_query if keyword_query is not None else query
+            collection = self.collection
+            # Embedding the query and the HNSW search are blocking; keep them off the event loop
+            query_embedding = (await asyncio.to_thread(self.embedding_function, [query]))[0]
+            results = await asyncio.to_thread(
+                collection.query,
+                query_embeddings=[query_embedding],
+                n_results=n_results * settings.HYBRID_CANDIDATE_MULTIPLIER,
+                where=where
             )
-            
-            if not results['documents'][0]:
+
+            matches: Dict[str, Dict] = {}
+            if results['documents'] and results['documents'][0]:
+                for i in range(len(results['documents'][0])):
+                    match = {
+                        "document": results['documents'][0][i],
+                        "metadata": results['metadatas'][0][i],
+                    }
+                    if results.get('distances'):
+                        match["similarity"] = 1 - results['distances'][0][i]  # Convert distance to similarity
+                    matches[results['ids'][0][i]] = match
+
+            keyword_matches = await self._keyword_candidates(collection, keyword_query, query_embedding, where)
+            for program_id, match in keyword_matches.items():
+                matches.setdefault(program_id, match)
+            if not matches:
                 return []
+            matches = list(matches.values())
 
-            # Format results
-            matches = []
-            for i in range(len(results['documents'][0])):
-                match = {
-                    "document": results['documents'][0][i],
-                    "metadata": results['metadatas'][0][i],
-                }
-                if 'distances' in results:
-                    match["similarity"] = 1 - results['distances'][0][i]  # Convert distance to similarity
-                matches.append(match)
+            # Hybrid ranking: normalized BM25 over titles blended with similarity
+            keyword_scores = bm25_scores(keyword_query, [match["metadata"].get("name", "") for match in matches])
+            max_keyword = max(keyword_scores) or 1.0
+            weight = settings.HYBRID_KEYWORD_WEIGHT
+            for match, keyword_score in zip(matches, keyword_scores):
+                match["keyword_score"] = keyword_score / max_keyword
+                match["score"] = (1 - weight) * match.get("similarity", 0.0) + weight * match["keyword_score"]
 
-            return matches
+            matches.sort(key=lambda match: match["score"], reverse=True)
+            return matches[:n_results]
 
         except Exception as e:
             print(f"Error searching vector store: {str(e)}")
             raise
+
+    async def _get_title_index(self, collection) -> TitleIndex:
+        """Title index of the collection, rebuilt after local writes or when it is older than the query cache TTL"""
+        key = (collection.name, self.generation)
+        if (
+            self._title_index is None
+            or self._title_index_key != key
+            or time.monotonic() - self._title_index_loaded_at > settings.QUERY_CACHE_TTL_SECONDS
+        ):
+            results = await asyncio.to_thread(collection.get, include=['metadatas'])
+            self._title_index = TitleIndex(
+                results['ids'],
+                [(metadata or {}).get("name", "") for metadata in results['metadatas']]
+            )
+            self._title_index_key = key
+            self._title_index_loaded_at = time.monotonic()
+        return self._title_index
+
+    async def _keyword_candidates(
+        self,
+        collection,
+        keyword_query: str,
+        query_embedding: List[float],
+        where: Optional[Dict]
+    ) -> Dict[str, Dict]:
+        """Filtered programs with the best title matches, with their similarity to the query"""
+        if settings.HYBRID_KEYWORD_CANDIDATES <= 0:
+            return {}
+        title_index = await self._get_title_index(collection)
+        # Fetch extra title matches since the filters may exclude some
+        ids = [
+            program_id for program_id, _ in
+            title_index.search(keyword_query, settings.HYBRID_KEYWORD_CANDIDATES * 2)
+        ]
+        if not ids:
+            return {}
+        results = await asyncio.to_thread(
+            collection.get,
+            ids=ids,
+            where=where,
+            include=['documents', 'metadatas', 'embeddings']
+        )
+
+        rank = {program_id: position for position, program_id in enumerate(ids)}
+        found = sorted(
+            zip(results['ids'], results['documents'], results['metadatas'], results['embeddings']),
+            key=lambda row: rank[row[0]]
+        )[:settings.HYBRID_KEYWORD_CANDIDATES]
+        query_norm = math.sqrt(sum(x * x for x in query_embedding)) or 1.0
+        candidates = {}
+        for program_id, document, metadata, embedding in found:
+            norm = math.sqrt(sum(x * x for x in embedding)) or 1.0
+            candidates[program_id] = {
+                "document": document,
+                "metadata": metadata,
+                "similarity": sum(a * b for a, b in zip(query_embedding, embedding)) / (query_norm * norm)
+            }
+        return candidates
             
     async def get_program_by_id(self, program_id: str) -> Optional[Dict]:
         """Retrieve a specific program by ID."""
         await self.ensure_initialized()
         
         try:
-            results = self.collection.get(
-                ids=[program_id]
-            )
+            results = await asyncio.to_thread(self.collection.get, ids=[program_id])
             
             if results['documents']:
                 return {
@@ -149,20 +428,23 @@ class VectorStore:
         await self.ensure_initialized()
         
         try:
-            return self.collection.count()
+            return await asyncio.to_thread(self.collection.count)
         except Exception as e:
             print(f"Error getting program count: {str(e)}")
             raise
 
     async def clear_programs(self):
-        """Clear all programs from the store."""
+        """Clear all programs from the active collection."""
         await self.ensure_initialized()
         
         try:
-            self.collection.delete(
-                where={},  # Empty where clause deletes all
-            )
-            print("✅ Cleared all programs from vector store")
+            # Delete by id: an empty where clause is rejected or ignored depending on the Chroma version
+            program_ids = await self.get_program_ids()
+            batch_size = settings.VECTOR_UPSERT_BATCH_SIZE
+            for start in range(0, len(program_ids), batch_size):
+                await self.delete_programs(program_ids[start:start + batch_size])
+            self.generation += 1
+            print(f"✅ Cleared {len(program_ids)} programs from vector store")
         except Exception as e:
             print(f"Error clearing programs: {str(e)}")
             raise
\ No newline at end of file
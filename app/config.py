@@ -1,6 +1,7 @@
 # app/config.py
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
+from typing import Optional
 import os
 
 # Load .env file
@@ -8,11 +9,86 @@ load_dotenv()
 
 class Settings(BaseSettings):
     # AI Services
-    GROQ_API_KEY: str = os.getenv("GROQ_API_KEY")
-    DATA_GOV_API_KEY: str = os.getenv("DATA_GOV_API_KEY")
+    GROQ_API_KEY: Optional[str] = os.getenv("GROQ_API_KEY")
+    DATA_GOV_API_KEY: Optional[str] = os.getenv("DATA_GOV_API_KEY")
+
+    # LLM backend
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "groq")  # "groq" or "local"
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "mixtral-8x7b-32768")
+    LLM_MAX_CONCURRENCY: int = 8  # Concurrent completions per worker
+    LLM_MAX_CONNECTIONS: int = 20  # Pooled HTTP connections to the LLM API
+    LLM_TIMEOUT_SECONDS: float = 60.0  # Per-request timeout
+    LLM_MAX_RETRIES: int = 2
+    LLM_LOCAL_LATENCY_SECONDS: float = 0.5  # Simulated latency of the local backend
     
+    # College Scorecard crawler
+    SCORECARD_API_URL: str = os.getenv("SCORECARD_API_URL", "https://api.data.gov/ed/collegescorecard/v1/schools")
+    SCORECARD_PER_PAGE: int = 100  # API maximum
+    SCORECARD_MAX_CONCURRENCY: int = 4  # Pages fetched in parallel
+    SCORECARD_MAX_RETRIES: int = 5  # Retries on 429/5xx/connection errors
+    SCORECARD_BACKOFF_SECONDS: float = 1.0  # Base of the exponential backoff
+    SCORECARD_CURSOR_PATH: str = os.getenv("SCORECARD_CURSOR_PATH", "./scorecard_cursor.json")
+
+    # Ingestion pipeline
+    PROGRAM_REFRESH_INTERVAL_HOURS: float = 24  # Startup skips the refresh if the last one is newer than this
+    TOMBSTONE_AFTER_MISSED_RUNS: int = 3  # Complete crawls a Scorecard program must be missing from before it is deleted
+    INGESTION_LEASE_SECONDS: float = 300  # Refresh lease, renewed every third of this while a refresh runs
+    INGESTION_JITTER_SECONDS: float = 300  # Random delay added to each due refresh so workers do not race
+    ADMIN_TOKEN: Optional[str] = os.getenv("ADMIN_TOKEN")  # /api/admin requires it in the X-Admin-Token header
+    ADMIN_ALLOW_UNAUTHENTICATED: bool = False  # Open /api/admin without a token when ADMIN_TOKEN is unset (local development only)
+    PIPELINE_QUEUE_SIZE: int = 4  # Pages buffered between fetch, transform and store stages
+
+    # SQL -> vector index sync
+    INDEXER_BATCH_SIZE: int = 256  # Outbox changes applied to the vector index per batch
+    INDEXER_POLL_INTERVAL_SECONDS: float = 5.0  # Outbox poll interval when no write notified the indexer
+    INDEXER_LEASE_SECONDS: float = 60  # Lease that lets one worker at a time drain the outbox
+
+    # Vector store
+    VECTOR_UPSERT_BATCH_SIZE: int = 256  # Documents embedded and written per batch
+    HYBRID_CANDIDATE_MULTIPLIER: int = 2  # Filtered candidates fetched per result for re-ranking
+    HYBRID_KEYWORD_CANDIDATES: int = 50  # Best filtered program title matches merged into the candidates
+    HYBRID_KEYWORD_WEIGHT: float = 0.3  # Weight of the title BM25 score vs. vector similarity
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"  # Chroma's default embedding model
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.db")
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 50000
+    INDEX_RETAINED_VERSIONS: int = 1  # Retired collections kept for rollback after a rebuild
+    INDEX_VERSION_POLL_SECONDS: float = 30  # How often workers check for a swapped collection
+    INDEX_AUTO_REBUILD: bool = True  # Rebuild at startup if the index predates the embedding model or document format
+
+    # Retrieval cache
+    QUERY_CACHE_MAX_ENTRIES: int = 1024
+    QUERY_CACHE_TTL_SECONDS: float = 300  # Also bounds staleness after writes by other workers
+
+    # Prompt assembly
+    CONTEXT_TOKEN_BUDGET: int = 8192  # Prompt tokens; the model window also holds the 1024-token completion
+    CONTEXT_DOCUMENT_SHARE: float = 0.5  # Share of the budget left after system prompt and query given to documents
+
+    # Program bulk import/export
+    PROGRAM_IMPORT_BATCH_SIZE: int = 1000  # Rows written per transaction
+    PROGRAM_IMPORT_MAX_LINE_BYTES: int = 1024 * 1024  # Longer NDJSON lines are rejected without being buffered
+    PROGRAM_EXPORT_BATCH_SIZE: int = 1000  # Rows read per keyset page
+
+    # Conversations
+    CONVERSATION_STORE: str = os.getenv("CONVERSATION_STORE", "sql")  # "sql" or "memory"
+    CONVERSATION_CACHE_SIZE: int = 1000  # Conversations kept in the per-worker hot cache
+    CONVERSATION_TTL_HOURS: float = 24  # Idle conversations older than this are deleted
+    CONVERSATION_SWEEP_INTERVAL_SECONDS: float = 3600
+    CONVERSATION_SUMMARIES_ENABLED: bool = True
+    SUMMARY_TRIGGER_MESSAGES: int = 20  # Unsummarized messages that trigger a background summary
+    SUMMARY_KEEP_RECENT_MESSAGES: int = 10  # Newest messages always kept verbatim
+
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./grad_admissions.db")
+    # Connection pool (server databases such as PostgreSQL)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True  # Detect connections dropped by the server before use
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # SQLite connection pragmas
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB memory-mapped I/O
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait for locks instead of failing with "database is locked"
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,332 @@
+from typing import Dict, List, Optional, Set
+import asyncio
+import uuid
+from datetime import datetime
+from sqlalchemy import desc, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.data.lease import DatabaseLease, worker_id
+from app.data.program_indexer import ProgramIndexer
+from app.data.program_repository import program_to_document
+from app.database import AsyncSessionLocal
+from app.models.program import Program
+from app.models.vector_index import VectorIndexVersionDB
+
+class VectorIndexManager:
+    """
+    Versioned program collections with background rebuilds and atomic swaps.
+
+    vector_index_versions records every collection built for the program
+    index and which one is active. A rebuild fills a new collection from
+    the programs table while the active one keeps serving, then switches
+    reads to it in one step; the previous collection is kept for rollback.
+    Other workers follow the switch by polling the active version. The
+    switch itself holds the program indexer's lease, so no outbox batch
+    can write to the retired collection after its final catch-up.
+    """
+
+    LEASE_NAME = "vector_index_rebuild"
+
+    def __init__(
+        self,
+        vector_store,
+        session_factory=AsyncSessionLocal,
+        retained_versions: int = settings.INDEX_RETAINED_VERSIONS,
+        poll_interval: float = settings.INDEX_VERSION_POLL_SECONDS,
+        lease_seconds: float = settings.INGESTION_LEASE_SECONDS
+    ):
+        self.vector_store = vector_store
+        self.session_factory = session_factory
+        self.retained_versions = retained_versions
+        self.poll_interval = poll_interval
+        self.lease = DatabaseLease(self.LEASE_NAME, worker_id(), lease_seconds, session_factory)
+        self.indexer_lease = DatabaseLease(
+            ProgramIndexer.LEASE_NAME, worker_id(), settings.INDEXER_LEASE_SECONDS, session_factory
+        )
+        self.rebuilding = False
+        self._task: Optional[asyncio.Task] = None
+
+    def is_outdated(self, version: VectorIndexVersionDB) -> bool:
+        """Whether a version was built with another embedding model or document format"""
+        return (
+            version.embedding_model != self.vector_store.embedding_function.model_name
+            or version.document_format != self.vector_store.DOCUMENT_FORMAT_VERSION
+        )
+
+    async def get_active(self) -> Optional[VectorIndexVersionDB]:
+        async with self.session_factory() as db:
+            return (await db.execute(
+                select(VectorIndexVersionDB)
+                .where(VectorIndexVersionDB.status == "active")
+                .order_by(desc(VectorIndexVersionDB.activated_at))
+                .limit(1)
+            )).scalar()
+
+    async def get_versions(self) -> List[VectorIndexVersionDB]:
+        async with self.session_factory() as db:
+            result = await db.execute(select(VectorIndexVersionDB).order_by(desc(VectorIndexVersionDB.id)))
+            return list(result.scalars())
+
+    async def initialize(self):
+        """Open the active collection; on first run the existing collection becomes version 1"""
+        active = await self.get_active()
+        if active is None:
+            async with self.session_factory() as db:
+                db.add(VectorIndexVersionDB(
+                    collection_name=self.vector_store.collection_name,
+                    status="active",
+                    embedding_model=self.vector_store.embedding_function.model_name,
+                    document_format=self.vector_store.DOCUMENT_FORMAT_VERSION,
+                    activated_at=datetime.utcnow()
+                ))
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    # Another worker registered it first
+                    await db.rollback()
+            active = await self.get_active()
+
+        await self.vector_store.initialize(active.collection_name)
+        if self.is_outdated(active):
+            print(
+                f"⚠️ Vector index {active.collection_name} was built with {active.embedding_model} "
+                f"(format {active.document_format}); a rebuild is needed"
+            )
+
+    async def refresh_active(self):
+        """Follow a swap or rollback made by another worker"""
+        active = await self.get_active()
+        if active is not None and active.collection_name != self.vector_store.collection_name:
+            await self.vector_store.use_collection(active.collection_name)
+
+    async def watch(self):
+        """Poll the active version so every worker serves the same collection"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh_active()
+            except Exception as e:
+                print(f"Error checking active vector index: {str(e)}")
+
+    async def sync_collection(self, collection) -> Dict[str, int]:
+        """
+        Make a collection match the programs table.
+
+        Only new and changed programs are embedded, so running this again
+        after a full build just catches up with writes made in the meantime.
+        """
+        counts = {"new": 0, "changed": 0, "unchanged": 0, "deleted": 0}
+        sql_ids: Set[str] = set()
+        async with self.session_factory() as db:
+            last_id = None
+            while True:
+                query = select(Program).order_by(Program.id).limit(settings.PROGRAM_EXPORT_BATCH_SIZE)
+                if last_id is not None:
+                    query = query.where(Program.id > last_id)
+                programs = (await db.execute(query)).scalars().all()
+                if not programs:
+                    break
+                batch_counts = await self.vector_store.upsert_programs(
+                    [program_to_document(program) for program in programs],
+                    collection=collection
+                )
+                for key, value in batch_counts.items():
+                    counts[key] += value
+                sql_ids.update(program.id for program in programs)
+                last_id = programs[-1].id
+                db.expunge_all()
+
+        orphaned = [
+            program_id for program_id in await self.vector_store.get_program_ids(collection=collection)
+            if program_id not in sql_ids
+        ]
+        batch_size = settings.VECTOR_UPSERT_BATCH_SIZE
+        for start in range(0, len(orphaned), batch_size):
+            counts["deleted"] += await self.vector_store.delete_programs(
+                orphaned[start:start + batch_size],
+                collection=collection
+            )
+        return counts
+
+    async def _activate(self, version_id: int) -> VectorIndexVersionDB:
+        """Make a version the active one and retire the current one, in one transaction"""
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            await db.execute(
+                update(VectorIndexVersionDB)
+                .where(VectorIndexVersionDB.status == "active")
+                .values(status="retired")
+            )
+            await db.execute(
+                update(VectorIndexVersionDB)
+                .where(VectorIndexVersionDB.id == version_id)
+                .values(status="active", activated_at=now)
+            )
+            await db.commit()
+            return await db.get(VectorIndexVersionDB, version_id)
+
+    async def _switch_to(self, version_id: int, collection_name: str) -> VectorIndexVersionDB:
+        """Catch a collection up, then swap reads to it with outbox draining paused"""
+        collection = await asyncio.to_thread(self.vector_store.open_collection, collection_name)
+        await self.sync_collection(collection)
+        await self.indexer_lease.wait_acquire()
+        try:
+            version = await self.indexer_lease.hold(self._activate_and_catch_up(version_id, collection_name))
+        finally:
+            await self.indexer_lease.release()
+
+        program_count = await asyncio.to_thread(self.vector_store.collection.count)
+        async with self.session_factory() as db:
+            await db.execute(
+                update(VectorIndexVersionDB)
+                .where(VectorIndexVersionDB.id == version_id)
+                .values(program_count=program_count)
+            )
+            await db.commit()
+        version.program_count = program_count
+        return version
+
+    async def _activate_and_catch_up(self, version_id: int, collection_name: str) -> VectorIndexVersionDB:
+        """Swap reads, then apply writes drained into the old collection since the last catch-up"""
+        version = await self._activate(version_id)
+        await self.vector_store.use_collection(collection_name)
+        await self.sync_collection(self.vector_store.collection)
+        return version
+
+    async def _claim(self) -> bool:
+        """Take this worker's rebuild slot and the rebuild lease; False if either is held"""
+        if self.rebuilding:
+            return False
+        # Claimed before the first await: the lease is re-entrant, so it does
+        # not stop a second rebuild or rollback in this worker
+        self.rebuilding = True
+        try:
+            if await self.lease.try_acquire():
+                return True
+        except BaseException:
+            self.rebuilding = False
+            raise
+        self.rebuilding = False
+        return False
+
+    async def start_rebuild(self) -> Optional[int]:
+        """Start building a new collection in the background; returns its version id, or None if a rebuild is running"""
+        if not await self._claim():
+            return None
+        try:
+            async with self.session_factory() as db:
+                version = VectorIndexVersionDB(
+                    collection_name=f"programs_{uuid.uuid4().hex[:12]}",
+                    status="building",
+                    embedding_model=self.vector_store.embedding_function.model_name,
+                    document_format=self.vector_store.DOCUMENT_FORMAT_VERSION
+                )
+                db.add(version)
+                await db.commit()
+                version_id, collection_name = version.id, version.collection_name
+        except BaseException:
+            self.rebuilding = False
+            await self.lease.release()
+            raise
+        self._task = asyncio.create_task(self._rebuild(version_id, collection_name))
+        return version_id
+
+    async def _rebuild(self, version_id: int, collection_name: str):
+        status, error = "active", None
+        try:
+            await self.lease.hold(self._build_and_switch(collection_name, version_id))
+        except asyncio.CancelledError:
+            status, error = "failed", "cancelled"
+            raise
+        except Exception as e:
+            status, error = "failed", str(e)
+            print(f"❌ Vector index rebuild failed: {str(e)}")
+        finally:
+            try:
+                if status == "failed":
+                    async with self.session_factory() as db:
+                        await db.execute(
+                            update(VectorIndexVersionDB)
+                            .where(VectorIndexVersionDB.id == version_id)
+                            .where(VectorIndexVersionDB.status == "building")
+                            .values(status="failed", error=error)
+                        )
+                        await db.commit()
+                    if self.vector_store.collection_name != collection_name:
+                        await self.vector_store.drop_collection(collection_name)
+                await self.lease.release()
+            except Exception as e:
+                print(f"❌ Error recording vector index rebuild {version_id}: {str(e)}")
+            finally:
+                self.rebuilding = False
+
+    async def _build_and_switch(self, collection_name: str, version_id: int):
+        print(f"🔄 Building vector index {collection_name}...")
+        collection = await asyncio.to_thread(self.vector_store.open_collection, collection_name)
+        counts = await self.sync_collection(collection)
+        print(f"Built {collection_name}: {counts['new']} programs embedded")
+        version = await self._switch_to(version_id, collection_name)
+        print(f"✅ Vector index switched to {collection_name} ({version.program_count} programs)")
+        await self._drop_old_versions()
+
+    async def rollback(self) -> Optional[VectorIndexVersionDB]:
+        """
+        Switch back to the most recently retired collection.
+
+        It is caught up with program writes made since it was retired before
+        reads switch to it. Returns None if a rebuild or rollback is running;
+        raises LookupError if there is no retained version.
+        """
+        if not await self._claim():
+            return None
+        try:
+            async with self.session_factory() as db:
+                previous = (await db.execute(
+                    select(VectorIndexVersionDB)
+                    .where(VectorIndexVersionDB.status == "retired")
+                    .order_by(desc(VectorIndexVersionDB.activated_at))
+                    .limit(1)
+                )).scalar()
+            if previous is None:
+                raise LookupError("No retained vector index version to roll back to")
+            version = await self.lease.hold(self._switch_to(previous.id, previous.collection_name))
+            print(f"✅ Vector index rolled back to {previous.collection_name}")
+            return version
+        finally:
+            await self.lease.release()
+            self.rebuilding = False
+
+    async def _drop_old_versions(self):
+        """Drop retired collections beyond the ones kept for rollback"""
+        async with self.session_factory() as db:
+            retired = (await db.execute(
+                select(VectorIndexVersionDB)
+                .where(VectorIndexVersionDB.status == "retired")
+                .order_by(desc(VectorIndexVersionDB.activated_at))
+            )).scalars().all()
+            for version in retired[self.retained_versions:]:
+                await self.vector_store.drop_collection(version.collection_name)
+                version.status = "dropped"
+                print(f"Dropped vector index {version.collection_name}")
+            await db.commit()
+
+    async def rebuild_if_outdated(self):
+        """Rebuild in the background if the active index predates the current model or document format"""
+        try:
+            active = await self.get_active()
+            if active is not None and self.is_outdated(active) and await self.start_rebuild() is not None:
+                await self.wait()
+        except Exception as e:
+            print(f"Error starting vector index rebuild: {str(e)}")
+
+    async def wait(self):
+        """Wait for the rebuild started by this worker, if any"""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def close(self):
+        """Cancel a rebuild still running at shutdown; its partial collection is dropped"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
@@ -0,0 +1,187 @@
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import random
+from datetime import datetime
+from sqlalchemy import desc, select, update
+
+from app.config import settings
+from app.data.lease import DatabaseLease, LeaseLostError, worker_id
+from app.database import AsyncSessionLocal
+from app.models.ingestion import IngestionRunDB, SchedulerLeaseDB
+
+class IngestionScheduler:
+    """
+    Runs ProgramDataPipeline refreshes in exactly one worker at a time.
+
+    Every worker runs the scheduler loop; a lease row in scheduler_leases
+    decides which one ingests. The holder renews the lease while the
+    refresh runs, so a crashed worker's lease expires and another worker
+    takes over on its next check; a holder that loses the lease cancels
+    its refresh first. Runs are recorded in ingestion_runs, whose
+    last finished run also decides when the next one is due.
+    """
+
+    LEASE_NAME = "program_refresh"
+
+    def __init__(
+        self,
+        pipeline,
+        session_factory=AsyncSessionLocal,
+        interval_hours: float = settings.PROGRAM_REFRESH_INTERVAL_HOURS,
+        jitter_seconds: float = settings.INGESTION_JITTER_SECONDS,
+        lease_seconds: float = settings.INGESTION_LEASE_SECONDS
+    ):
+        self.pipeline = pipeline
+        self.session_factory = session_factory
+        self.interval_hours = interval_hours
+        self.jitter_seconds = jitter_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id()
+        self.lease = DatabaseLease(self.LEASE_NAME, self.worker_id, lease_seconds, session_factory)
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def try_acquire(self) -> bool:
+        """
+        Take the refresh lease; on success, runs a previous holder left "running" are marked abandoned.
+
+        The lease is only free once the previous holder released it or let
+        it expire, and a holder cancels its refresh before its lease can
+        expire, so those runs are no longer writing.
+        """
+        if not await self.lease.try_acquire():
+            return False
+        async with self.session_factory() as db:
+            await db.execute(
+                update(IngestionRunDB)
+                .where(IngestionRunDB.status == "running")
+                .where(IngestionRunDB.holder != self.worker_id)
+                .values(status="abandoned", finished_at=datetime.utcnow())
+            )
+            await db.commit()
+        return True
+
+    async def trigger(self, trigger: str = "manual", full: bool = False) -> Optional[int]:
+        """Start a refresh (incremental, or a full rebuild) in the background if this worker gets the lease; returns the run id"""
+        if self.running:
+            return None
+        # Claimed before the first await: the lease is re-entrant, so it does
+        # not stop a second trigger in this worker
+        self.running = True
+        try:
+            if not await self.try_acquire():
+                self.running = False
+                return None
+            async with self.session_factory() as db:
+                run = IngestionRunDB(
+                    holder=self.worker_id,
+                    trigger=trigger,
+                    mode="full" if full else "incremental",
+                    status="running"
+                )
+                db.add(run)
+                await db.commit()
+                run_id = run.id
+        except BaseException:
+            self.running = False
+            await self.lease.release()
+            raise
+        self._task = asyncio.create_task(self._execute(run_id, full))
+        return run_id
+
+    async def _execute(self, run_id: int, full: bool):
+        """Run the refresh under the lease, cancelling it if the lease is lost, and record its outcome"""
+        values: Dict = {}
+        try:
+            values["counts"] = await self.lease.hold(self.pipeline.update_program_database(full=full))
+            values["status"] = "succeeded"
+        except LeaseLostError as e:
+            values.update(status="abandoned", error=str(e))
+            print(f"❌ Program data refresh stopped: {str(e)}")
+        except asyncio.CancelledError:
+            values["status"] = "cancelled"
+            raise
+        except Exception as e:
+            # A failed crawl keeps its cursor and resumes on the next run
+            values.update(status="failed", error=str(e))
+        finally:
+            try:
+                async with self.session_factory() as db:
+                    # A worker that took over the lease may have recorded it as abandoned already
+                    await db.execute(
+                        update(IngestionRunDB)
+                        .where(IngestionRunDB.id == run_id)
+                        .where(IngestionRunDB.status == "running")
+                        .values(finished_at=datetime.utcnow(), **values)
+                    )
+                    await db.commit()
+                await self.lease.release()
+            except Exception as e:
+                print(f"❌ Error recording ingestion run {run_id}: {str(e)}")
+            finally:
+                self.running = False
+
+    async def wait(self):
+        """Wait for the refresh started by this worker, if any"""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def close(self):
+        """Cancel a refresh still running at shutdown; it is recorded as cancelled"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def last_finished_at(self, statuses: Tuple[str, ...] = ("succeeded", "failed")) -> Optional[datetime]:
+        """Finish time of the latest run in any worker with one of the given statuses"""
+        query = select(IngestionRunDB.finished_at).where(IngestionRunDB.status.in_(statuses))
+        async with self.session_factory() as db:
+            return (await db.execute(query.order_by(desc(IngestionRunDB.finished_at)).limit(1))).scalar()
+
+    async def seconds_until_due(self) -> float:
+        """Seconds until the next refresh is due; 0 if no run has completed recently"""
+        last_finished = await self.last_finished_at()
+        if last_finished is None:
+            return 0.0
+        age = (datetime.utcnow() - last_finished).total_seconds()
+        return max(0.0, self.interval_hours * 3600 - age)
+
+    async def run(self):
+        """
+        Scheduler loop run by every worker.
+
+        Sleeps until the next refresh is due plus random jitter, so workers
+        do not all race for the lease at once, then runs the refresh if it
+        gets the lease. Workers that lose the race check again after a
+        lease period.
+        """
+        while True:
+            try:
+                delay = await self.seconds_until_due()
+                if delay > 0:
+                    print(f"Program data is fresh, next update in {delay / 3600:.1f}h")
+                await asyncio.sleep(delay + random.uniform(0, self.jitter_seconds))
+
+                if await self.seconds_until_due() > 0:
+                    # Another worker refreshed while we slept
+                    continue
+                if await self.trigger("scheduled") is not None:
+                    await self.wait()
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in scheduled update: {str(e)}")
+            await asyncio.sleep(self.lease_seconds)
+
+    async def get_lease(self) -> Optional[SchedulerLeaseDB]:
+        return await self.lease.get()
+
+    async def get_runs(self, limit: int = 20) -> List[IngestionRunDB]:
+        async with self.session_factory() as db:
+            result = await db.execute(select(IngestionRunDB).order_by(desc(IngestionRunDB.id)).limit(limit))
+            return list(result.scalars())
+
+    async def get_run(self, run_id: int) -> Optional[IngestionRunDB]:
+        async with self.session_factory() as db:
+            return await db.get(IngestionRunDB, run_id)
@@ -0,0 +1,144 @@
+from typing import Awaitable, Optional, TypeVar
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from app.database import AsyncSessionLocal
+from app.models.ingestion import SchedulerLeaseDB
+
+T = TypeVar("T")
+
+class LeaseLostError(RuntimeError):
+    """Raised when work run under a lease is cancelled because the lease was lost"""
+
+def worker_id() -> str:
+    """Identifies this worker process as a lease holder"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+class DatabaseLease:
+    """
+    A named, expiring lock row in scheduler_leases shared by all workers.
+
+    The holder must renew it before it expires; a crashed holder's lease
+    simply runs out and the next try_acquire in any worker takes it. Work
+    run through hold() is cancelled as soon as the lease is lost, or is
+    about to expire without a successful renewal, so it never overlaps
+    with the next holder's.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        holder: str,
+        lease_seconds: float,
+        session_factory=AsyncSessionLocal
+    ):
+        self.name = name
+        self.holder = holder
+        self.lease_seconds = lease_seconds
+        self.session_factory = session_factory
+
+    async def try_acquire(self) -> bool:
+        """Take the lease if it is free, expired or already ours"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(SchedulerLeaseDB)
+                .where(SchedulerLeaseDB.name == self.name)
+                .where((SchedulerLeaseDB.holder == self.holder) | (SchedulerLeaseDB.expires_at < now))
+                .values(holder=self.holder, acquired_at=now, expires_at=expires_at)
+            )
+            if result.rowcount == 0:
+                try:
+                    await db.execute(insert(SchedulerLeaseDB).values(
+                        name=self.name, holder=self.holder, acquired_at=now, expires_at=expires_at
+                    ))
+                except IntegrityError:
+                    # Another worker holds an unexpired lease
+                    await db.rollback()
+                    return False
+            await db.commit()
+        return True
+
+    async def renew(self) -> bool:
+        """Extend our lease; False if another worker has taken it"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(SchedulerLeaseDB)
+                .where(SchedulerLeaseDB.name == self.name)
+                .where(SchedulerLeaseDB.holder == self.holder)
+                .values(expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+            )
+            await db.commit()
+        return result.rowcount == 1
+
+    async def release(self):
+        """Expire our lease so any worker can take it"""
+        async with self.session_factory() as db:
+            await db.execute(
+                update(SchedulerLeaseDB)
+                .where(SchedulerLeaseDB.name == self.name)
+                .where(SchedulerLeaseDB.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    async def keep_alive(self):
+        """
+        Renew the lease every third of its duration; returns once it is lost.
+
+        A failed renewal is retried, but if none has succeeded for two
+        thirds of the lease the holder gives up before the lease can
+        expire under it.
+        """
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self.renew():
+                    print(f"⚠️ Lease {self.name} lost to another worker")
+                    return
+                renewed_at = time.monotonic()
+            except Exception as e:
+                print(f"⚠️ Error renewing lease {self.name}: {str(e)}")
+                if time.monotonic() - renewed_at >= self.lease_seconds * 2 / 3:
+                    print(f"⚠️ Lease {self.name} could not be renewed before expiring")
+                    return
+
+    async def wait_acquire(self, poll_interval: float = 1.0):
+        """Take the lease, waiting for the current holder to release it or let it expire"""
+        while not await self.try_acquire():
+            await asyncio.sleep(poll_interval)
+
+    async def hold(self, work: Awaitable[T]) -> T:
+        """
+        Run work while keeping the lease alive; the lease must already be held.
+
+        If the lease is lost the work is cancelled and LeaseLostError is
+        raised. The lease is not released here.
+        """
+        task = asyncio.ensure_future(work)
+        keep_alive = asyncio.create_task(self.keep_alive())
+        try:
+            await asyncio.wait({task, keep_alive}, return_when=asyncio.FIRST_COMPLETED)
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise LeaseLostError(f"Lease {self.name} was lost")
+            return task.result()
+        finally:
+            keep_alive.cancel()
+            if not task.done():
+                # Cancelled from outside while waiting
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    async def get(self) -> Optional[SchedulerLeaseDB]:
+        async with self.session_factory() as db:
+            return await db.get(SchedulerLeaseDB, self.name)
@@ -0,0 +1,197 @@
+from typing import Dict, List, Optional
+import asyncio
+import time
+from datetime import datetime
+from sqlalchemy import delete, func, select
+
+from app.config import settings
+from app.data.lease import DatabaseLease, worker_id
+from app.data.program_repository import program_to_document, record_program_changes
+from app.database import AsyncSessionLocal
+from app.models.program import Program, ProgramChangeDB
+
+class ProgramIndexer:
+    """
+    Applies the program_changes outbox to the vector store.
+    
+    Every program write (API, bulk import, Scorecard pipeline) goes to SQL
+    and records an outbox row in the same transaction; this is the only
+    code that writes programs to the vector index. Every worker runs the
+    indexer, but a lease row lets only one drain the outbox at a time:
+    two drainers could read a program before and after a write and apply
+    them out of order, leaving the index stale with no change queued.
+    """
+
+    LEASE_NAME = "program_indexer"
+
+    def __init__(
+        self,
+        vector_store,
+        index_versions=None,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = settings.INDEXER_BATCH_SIZE,
+        poll_interval: float = settings.INDEXER_POLL_INTERVAL_SECONDS,
+        lease_seconds: float = settings.INDEXER_LEASE_SECONDS
+    ):
+        self.vector_store = vector_store
+        # Lets writes follow a collection swapped in by another worker
+        self.index_versions = index_versions
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = DatabaseLease(self.LEASE_NAME, worker_id(), lease_seconds, session_factory)
+        self._wakeup = asyncio.Event()
+        self.indexed = 0
+        self.deleted = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def notify(self):
+        """Wake the indexer after committing program writes"""
+        self._wakeup.set()
+
+    async def index_pending(self, wait: bool = False) -> Optional[Dict[str, int]]:
+        """
+        Drain the outbox in batches under the indexer lease.
+
+        Returns counts of programs upserted and deleted, or None if another
+        worker holds the lease and wait is False; its drain picks up every
+        change committed so far.
+        """
+        if wait:
+            await self.lease.wait_acquire()
+        elif not await self.lease.try_acquire():
+            return None
+        try:
+            return await self.lease.hold(self._drain())
+        finally:
+            await self.lease.release()
+
+    async def _drain(self) -> Dict[str, int]:
+        counts = {"upserted": 0, "deleted": 0}
+        while True:
+            if self.index_versions is not None:
+                # A swap holds the indexer lease, so this batch writes to the collection active now
+                await self.index_versions.refresh_active()
+            async with self.session_factory() as db:
+                changes = (await db.execute(
+                    select(ProgramChangeDB).order_by(ProgramChangeDB.id).limit(self.batch_size)
+                )).scalars().all()
+                if not changes:
+                    break
+
+                # Only the latest change per program matters; a row that is gone
+                # by now was deleted after the change was recorded
+                program_ids = list({change.program_id for change in changes})
+                programs = (await db.execute(
+                    select(Program).where(Program.id.in_(program_ids))
+                )).scalars().all()
+                documents = [program_to_document(program) for program in programs]
+                deleted_ids = list(set(program_ids) - {program.id for program in programs})
+
+                if documents:
+                    await self.vector_store.upsert_programs(documents)
+                if deleted_ids:
+                    await self.vector_store.delete_programs(deleted_ids)
+
+                # Changes recorded while this batch was applied stay queued
+                await db.execute(
+                    delete(ProgramChangeDB).where(ProgramChangeDB.id.in_([change.id for change in changes]))
+                )
+                await db.commit()
+
+            counts["upserted"] += len(documents)
+            counts["deleted"] += len(deleted_ids)
+            self.indexed += len(documents)
+            self.deleted += len(deleted_ids)
+
+        self.last_run_at = datetime.utcnow()
+        return counts
+
+    async def run(self):
+        """Index pending changes whenever notified, polling as a fallback for other workers' writes"""
+        while True:
+            try:
+                counts = await self.index_pending()
+                self.last_error = None
+                if counts and (counts["upserted"] or counts["deleted"]):
+                    print(f"🔄 Indexed {counts['upserted']} programs, removed {counts['deleted']}")
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Error indexing program changes: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def lag_metrics(self) -> Dict:
+        """Outbox backlog: pending changes and the age of the oldest one"""
+        async with self.session_factory() as db:
+            pending, oldest = (await db.execute(
+                select(func.count(ProgramChangeDB.id), func.min(ProgramChangeDB.created_at))
+            )).one()
+        return {
+            "pending_changes": pending,
+            "oldest_pending_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+            "indexed": self.indexed,
+            "deleted": self.deleted,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_error": self.last_error
+        }
+
+    async def reconcile(self, fix: bool = False, sample_size: int = 20) -> Dict:
+        """
+        Diff the programs table against the vector index.
+        
+        Reports programs missing from the index, index entries with no SQL
+        row, and entries whose content hash no longer matches the SQL row.
+        With fix=True the differences are queued in the outbox and indexed.
+        """
+        started = time.perf_counter()
+        stored_hashes = await self.vector_store.get_content_hashes()
+
+        missing: List[str] = []
+        stale: List[str] = []
+        sql_ids = set()
+        async with self.session_factory() as db:
+            last_id = None
+            while True:
+                query = select(Program).order_by(Program.id).limit(settings.PROGRAM_EXPORT_BATCH_SIZE)
+                if last_id is not None:
+                    query = query.where(Program.id > last_id)
+                programs = (await db.execute(query)).scalars().all()
+                if not programs:
+                    break
+                for program in programs:
+                    sql_ids.add(program.id)
+                    if program.id not in stored_hashes:
+                        missing.append(program.id)
+                    elif stored_hashes[program.id] != self.vector_store.program_content_hash(program_to_document(program)):
+                        stale.append(program.id)
+                last_id = programs[-1].id
+                db.expunge_all()
+
+            orphaned = [program_id for program_id in stored_hashes if program_id not in sql_ids]
+
+            if fix and (missing or stale or orphaned):
+                record_program_changes(db, missing + stale, "upsert")
+                record_program_changes(db, orphaned, "delete")
+                await db.commit()
+
+        report = {
+            "sql_programs": len(sql_ids),
+            "indexed_programs": len(stored_hashes),
+            "missing_from_index": len(missing),
+            "stale_in_index": len(stale),
+            "orphaned_in_index": len(orphaned),
+            "samples": {
+                "missing_from_index": missing[:sample_size],
+                "stale_in_index": stale[:sample_size],
+                "orphaned_in_index": orphaned[:sample_size]
+            }
+        }
+        if fix:
+            report["fixed"] = await self.index_pending(wait=True)
+        report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return report
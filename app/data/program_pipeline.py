@@ -1,15 +1,22 @@
-from typing import List, Dict, Optional
-import aiohttp
+from typing import TYPE_CHECKING, List, Dict, Optional
 import asyncio
 from datetime import datetime
 import json
 import os
 from app.config import settings
+from app.data.program_repository import upsert_program_rows
+from app.data.scorecard_state import apply_tombstones, compute_school_hash, load_school_hashes, save_school_states
+from app.database import AsyncSessionLocal
+
+if TYPE_CHECKING:
+    from app.data.scorecard import ScorecardClient
 
 class ProgramDataPipeline:
-    def __init__(self, vector_store):
-        self.vector_store = vector_store
-        self.api_endpoint = "https://api.data.gov/ed/collegescorecard/v1/schools"
+    def __init__(self, indexer, session_factory=AsyncSessionLocal):
+        # Programs are written to SQL; the indexer propagates them to the vector store
+        self.indexer = indexer
+        self.session_factory = session_factory
+        self.api_endpoint = settings.SCORECARD_API_URL
         self.api_key = settings.DATA_GOV_API_KEY
         self.processed_ids = set()
         
@@ -40,26 +47,20 @@ class ProgramDataPipeline:
             '15.1204': 'Computer Software Technology'
         }
 
-    async def fetch_program_data(self, params: Dict) -> List[Dict]:
-        """Fetch program data from College Scorecard API"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                params["api_key"] = self.api_key
-                
-                async with session.get(self.api_endpoint, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        schools = data.get('results', [])
-                        print(f"Retrieved {len(schools)} schools")
-                        return schools
-                    else:
-                        error_text = await response.text()
-                        print(f"Error fetching data: Status {response.status}")
-                        print(f"Error details: {error_text}")
-                        return []
-        except Exception as e:
-            print(f"Error in fetch_program_data: {str(e)}")
-            return []
+    def create_scorecard_client(self) -> "ScorecardClient":
+        """Create a paginated College Scorecard crawler"""
+        # aiohttp is only needed while crawling
+        from app.data.scorecard import ScorecardClient
+
+        return ScorecardClient(
+            api_key=self.api_key,
+            api_endpoint=self.api_endpoint,
+            per_page=settings.SCORECARD_PER_PAGE,
+            max_concurrency=settings.SCORECARD_MAX_CONCURRENCY,
+            max_retries=settings.SCORECARD_MAX_RETRIES,
+            backoff_seconds=settings.SCORECARD_BACKOFF_SECONDS,
+            cursor_path=settings.SCORECARD_CURSOR_PATH
+        )
 
     def is_cs_program(self, program: Dict) -> bool:
         """Check if a program is CS-related based on CIP code or title"""
@@ -112,6 +113,7 @@ class ProgramDataPipeline:
                         "name": program.get("title"),
                         "university": school_name,
                         "location": f"{school_city}, {school_state}",
+                        "state": school_state,
                         "department": "Computer Science and Information Technology",
                         "description": self.generate_program_description(program, school_name, school_city, school_state, credential_info),
                         "requirements": {
@@ -141,6 +143,25 @@ class ProgramDataPipeline:
             print(f"Error in transform_program_data: {str(e)}")
             return []
 
+    def to_program_row(self, program: Dict) -> Dict:
+        """Map a transformed Scorecard program onto Program columns"""
+        requirements = program.get("requirements", {})
+        return {
+            "id": program["id"],
+            "name": program["name"],
+            "university": program["university"],
+            "location": program.get("location"),
+            "department": program["department"],
+            "degree_type": requirements.get("degree_type") or "Graduate Degree",
+            "description": program["description"],
+            "requirements": requirements,
+            "research_areas": program.get("researchAreas", []),
+            "application_deadlines": None,
+            "tuition": requirements.get("annual_cost"),
+            "funding_available": False,
+            "contact_info": None
+        }
+
     def generate_program_description(self, program: Dict, school_name: str, city: str, state: str, credential_info: Dict) -> str:
         """Generate a detailed program description"""
         try:
@@ -157,9 +178,19 @@ class ProgramDataPipeline:
         except Exception as e:
             return f"Graduate program in {program.get('title', 'Unknown Field')}"
 
-    async def update_program_database(self):
-        """Update program database with latest data"""
+    async def update_program_database(self, full: bool = False):
+        """
+        Update program database with latest data.
+        
+        Incremental by default: schools whose raw payload hash matches the
+        last crawl are not transformed or written again. full=True discards
+        any interrupted crawl and reprocesses every school. After a complete
+        crawl, programs no school produced are counted towards tombstoning.
+        """
         try:
+            if not self.api_key:
+                raise ValueError("DATA_GOV_API_KEY environment variable not set")
+
             # Clear the processed IDs set at the start of each update
             self.processed_ids.clear()
             
@@ -174,58 +205,178 @@ class ProgramDataPipeline:
                     "latest.admissions.admission_rate.overall",
                     "latest.student.size"
                 ]),
-                "per_page": 25,
                 "sort": "latest.student.size:desc",
                 "school.operating": 1,
                 "latest.programs.cip_4_digit.credential.level__range": "5..7"
             }
             
-            raw_data = await self.fetch_program_data(params)
-            if not raw_data:
+            if full:
+                school_hashes = {}
+            else:
+                async with self.session_factory() as db:
+                    school_hashes = await load_school_hashes(db)
+            
+            stats = {"schools": 0, "schools_changed": 0, "schools_unchanged": 0, "new": 0, "changed": 0, "unchanged": 0}
+            
+            # fetch pages -> transform -> batch write to SQL, connected by bounded
+            # queues so fetching the next page overlaps with writing the last
+            page_queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+            program_queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+            async with self.create_scorecard_client() as client:
+                if full:
+                    client.cursor.clear()
+                await self._run_stages(
+                    self._fetch_stage(client, params, page_queue, stats),
+                    self._transform_stage(page_queue, program_queue, school_hashes, stats),
+                    self._store_stage(client, program_queue, stats)
+                )
+                crawl_started_at = client.crawl_started_at
+            
+            school_count = stats.pop("schools")
+            counts = stats
+            if not school_count:
                 print("No data received from API")
-                return
+                return counts
             
-            new_count = 0
-            update_count = 0
-            
-            for school_data in raw_data:
-                programs = self.transform_program_data(school_data)
-                for program in programs:
-                    try:
-                        program_id = program["id"]
-                        
-                        # Skip if we've already processed this ID in current update
-                        if program_id in self.processed_ids:
-                            print(f"Skipping duplicate program ID: {program_id}")
-                            continue
-                        
-                        # Use add_or_update_program instead of add_program
-                        is_new = await self.vector_store.add_or_update_program(program)
-                        if is_new:
-                            new_count += 1
-                        else:
-                            update_count += 1
-                            
-                        self.processed_ids.add(program_id)
-                        
-                    except Exception as e:
-                        print(f"Error processing program: {str(e)}")
-                        continue
+            # Every page of this crawl (possibly across resumed attempts) is
+            # done, so schools not seen since it started are gone from the source
+            if crawl_started_at is not None:
+                async with self.session_factory() as db:
+                    counts.update(await apply_tombstones(
+                        db,
+                        crawl_started_at,
+                        missed_runs_limit=settings.TOMBSTONE_AFTER_MISSED_RUNS,
+                        batch_size=settings.PROGRAM_IMPORT_BATCH_SIZE
+                    ))
+                self.indexer.notify()
+            else:
+                counts.update(missing=0, tombstoned=0)
             
-            print(f"✅ Database update complete:")
-            print(f"   - Added {new_count} new programs")
-            print(f"   - Updated {update_count} existing programs")
-            print(f"   - Total unique programs: {len(self.processed_ids)}")
+            print(f"✅ Database update complete ({'full' if full else 'incremental'}):")
+            print(f"   - Crawled {school_count} schools ({counts['schools_changed']} changed, {counts['schools_unchanged']} unchanged)")
+            print(f"   - Added {counts['new']} new programs")
+            print(f"   - Updated {counts['changed']} changed programs")
+            print(f"   - Skipped {counts['unchanged']} unchanged programs")
+            print(f"   - {counts['missing']} stored programs missing from source, {counts['tombstoned']} deleted")
+            return counts
             
         except Exception as e:
             print(f"❌ Error updating program database: {str(e)}")
             raise
 
-    async def schedule_updates(self, interval_hours: int = 24):
-        """Schedule regular database updates"""
+    async def _run_stages(self, *stages):
+        """Run pipeline stages concurrently, cancelling the rest if one fails"""
+        tasks = [asyncio.create_task(stage) for stage in stages]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception():
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_stage(
+        self,
+        client: "ScorecardClient",
+        params: Dict,
+        page_queue: asyncio.Queue,
+        stats: Dict
+    ):
+        """Producer: put fetched (page, schools) pairs on the page queue"""
+        async for page, schools in client.iter_pages(params):
+            stats["schools"] += len(schools)
+            await page_queue.put((page, schools))
+        await page_queue.put(None)
+
+    async def _transform_stage(
+        self,
+        page_queue: asyncio.Queue,
+        program_queue: asyncio.Queue,
+        school_hashes: Dict[str, str],
+        stats: Dict
+    ):
+        """Transform each page of changed schools into unique programs"""
         while True:
-            try:
-                await self.update_program_database()
-            except Exception as e:
-                print(f"Error in scheduled update: {str(e)}")
-            await asyncio.sleep(interval_hours * 3600)
\ No newline at end of file
+            item = await page_queue.get()
+            if item is None:
+                await program_queue.put(None)
+                return
+            
+            page, schools = item
+            page_programs = []
+            changed_schools = []
+            unchanged_school_ids = []
+            for school_data in schools:
+                school_id = str(school_data.get("id"))
+                content_hash = compute_school_hash(school_data)
+                if school_hashes.get(school_id) == content_hash:
+                    unchanged_school_ids.append(school_id)
+                    continue
+
+                program_ids = []
+                for program in self.transform_program_data(school_data):
+                    program_id = program["id"]
+                    program_ids.append(program_id)
+                    
+                    # Skip if we've already processed this ID in current update
+                    if program_id in self.processed_ids:
+                        print(f"Skipping duplicate program ID: {program_id}")
+                        continue
+                    
+                    page_programs.append(program)
+                    self.processed_ids.add(program_id)
+                changed_schools.append({"school_id": school_id, "content_hash": content_hash, "program_ids": program_ids})
+
+            stats["schools_changed"] += len(changed_schools)
+            stats["schools_unchanged"] += len(unchanged_school_ids)
+            await program_queue.put((page, page_programs, changed_schools, unchanged_school_ids))
+
+    async def _store_stage(
+        self,
+        client: "ScorecardClient",
+        program_queue: asyncio.Queue,
+        stats: Dict
+    ):
+        """Consumer: write programs and school sync state to SQL in batches, then mark their pages done"""
+        buffer: List[Dict] = []
+        buffered_pages: List[int] = []
+        changed_schools: List[Dict] = []
+        unchanged_school_ids: List[str] = []
+
+        async def flush():
+            # Programs and school state commit together, so a crash never
+            # records a school as synced without its programs
+            async with self.session_factory() as db:
+                counts = await upsert_program_rows(
+                    db,
+                    [self.to_program_row(program) for program in buffer],
+                    source="scorecard"
+                )
+                await save_school_states(db, changed_schools, unchanged_school_ids, datetime.utcnow())
+                await db.commit()
+            self.indexer.notify()
+            stats["new"] += counts["inserted"]
+            stats["changed"] += counts["updated"]
+            stats["unchanged"] += counts["unchanged"]
+            for page in buffered_pages:
+                client.mark_page_done(page)
+            buffer.clear()
+            buffered_pages.clear()
+            changed_schools.clear()
+            unchanged_school_ids.clear()
+
+        while True:
+            item = await program_queue.get()
+            if item is None:
+                await flush()
+                return
+            
+            page, page_programs, page_changed, page_unchanged = item
+            buffer.extend(page_programs)
+            buffered_pages.append(page)
+            changed_schools.extend(page_changed)
+            unchanged_school_ids.extend(page_unchanged)
+            if len(buffer) + len(unchanged_school_ids) >= settings.PROGRAM_IMPORT_BATCH_SIZE:
+                await flush()
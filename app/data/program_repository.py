@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import hashlib
+import json
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.program import Program, ProgramChangeDB
+
+# Columns whose change requires re-indexing a program
+CONTENT_FIELDS = [
+    "name", "university", "location", "department", "degree_type", "description",
+    "requirements", "research_areas", "application_deadlines", "tuition",
+    "funding_available", "contact_info"
+]
+
+def compute_row_hash(row: Dict) -> str:
+    """Hash the content columns of a program row"""
+    payload = json.dumps({field: row.get(field) for field in CONTENT_FIELDS}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def program_to_document(program: Program) -> Dict:
+    """Convert a Program row into the dict VectorStore builds documents from"""
+    requirements = dict(program.requirements or {})
+    # Columns fill in what the search filters and document expect from requirements
+    requirements.setdefault("degree_type", program.degree_type)
+    if program.tuition is not None:
+        requirements.setdefault("annual_cost", program.tuition)
+    return {
+        "id": program.id,
+        "name": program.name,
+        "university": program.university,
+        "location": program.location or "Unknown Location",
+        "department": program.department,
+        "description": program.description,
+        "requirements": requirements,
+        "researchAreas": program.research_areas or [],
+    }
+
+def record_program_changes(db: AsyncSession, program_ids: List[str], operation: str):
+    """Queue outbox rows in the caller's transaction; ProgramIndexer applies them to the index"""
+    for program_id in program_ids:
+        db.add(ProgramChangeDB(program_id=program_id, operation=operation))
+
+async def upsert_program_rows(
+    db: AsyncSession,
+    rows: List[Dict],
+    source: str = "api"
+) -> Dict[str, int]:
+    """
+    Insert or update program rows (dicts of Program columns, including id) in bulk.
+    
+    Rows whose content hash is unchanged are skipped. New and changed rows
+    are written with one multi-row INSERT and one bulk UPDATE by primary
+    key, and queued for indexing in the same transaction. The caller owns
+    the transaction.
+    """
+    # Duplicate ids within a batch: the last occurrence wins
+    unique = {row["id"]: row for row in rows}
+    if not unique:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    result = await db.execute(
+        select(Program.id, Program.content_hash).where(Program.id.in_(list(unique)))
+    )
+    stored_hashes = dict(result.all())
+
+    now = datetime.utcnow()
+    new_rows, updated_rows = [], []
+    for program_id, row in unique.items():
+        content_hash = compute_row_hash(row)
+        if program_id in stored_hashes and stored_hashes[program_id] == content_hash:
+            continue
+        row = {**row, "source": source, "content_hash": content_hash, "updated_at": now}
+        (updated_rows if program_id in stored_hashes else new_rows).append(row)
+
+    if new_rows:
+        await db.execute(insert(Program), new_rows)
+    if updated_rows:
+        await db.execute(update(Program), updated_rows)
+    record_program_changes(db, [row["id"] for row in new_rows + updated_rows], "upsert")
+
+    return {
+        "inserted": len(new_rows),
+        "updated": len(updated_rows),
+        "unchanged": len(unique) - len(new_rows) - len(updated_rows)
+    }
+
+async def delete_program_rows(db: AsyncSession, program_ids: List[str]) -> int:
+    """Delete programs and queue their removal from the index. The caller owns the transaction."""
+    if not program_ids:
+        return 0
+    result = await db.execute(delete(Program).where(Program.id.in_(program_ids)))
+    record_program_changes(db, program_ids, "delete")
+    return result.rowcount
+
+async def get_program_ids(db: AsyncSession, source: Optional[str] = None) -> List[str]:
+    query = select(Program.id)
+    if source is not None:
+        query = query.where(Program.source == source)
+    return list((await db.execute(query)).scalars())
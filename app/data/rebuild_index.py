@@ -0,0 +1,44 @@
+"""
+Rebuild the program vector index into a new collection and switch to it.
+
+    python -m app.data.rebuild_index              # build, then swap atomically
+    python -m app.data.rebuild_index --rollback   # switch back to the previous collection
+
+Running workers keep serving the old collection during the build and
+follow the switch within INDEX_VERSION_POLL_SECONDS.
+"""
+import argparse
+import asyncio
+import json
+
+from app.ai.vector_store import VectorStore
+from app.data.index_versions import VectorIndexManager
+from app.database import async_engine, create_db_and_tables
+from app.models.vector_index import VectorIndexVersion
+
+async def main(rollback: bool):
+    create_db_and_tables()
+    index_versions = VectorIndexManager(VectorStore())
+    await index_versions.initialize()
+    try:
+        if rollback:
+            version = await index_versions.rollback()
+        else:
+            version_id = await index_versions.start_rebuild()
+            if version_id is not None:
+                await index_versions.wait()
+                version = next(v for v in await index_versions.get_versions() if v.id == version_id)
+            else:
+                version = None
+        if version is None:
+            print("❌ Another worker is rebuilding the vector index")
+            return
+        print(json.dumps(VectorIndexVersion.model_validate(version).model_dump(mode="json"), indent=2))
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rollback", action="store_true", help="Switch back to the previously active collection")
+    args = parser.parse_args()
+    asyncio.run(main(args.rollback))
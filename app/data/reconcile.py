@@ -0,0 +1,30 @@
+"""
+Diff the programs SQL table against the vector index.
+
+    python -m app.data.reconcile          # report differences
+    python -m app.data.reconcile --fix    # queue and apply the missing changes
+"""
+import argparse
+import asyncio
+import json
+
+from app.ai.vector_store import VectorStore
+from app.data.index_versions import VectorIndexManager
+from app.data.program_indexer import ProgramIndexer
+from app.database import async_engine, create_db_and_tables
+
+async def main(fix: bool):
+    create_db_and_tables()
+    vector_store = VectorStore()
+    await VectorIndexManager(vector_store).initialize()
+    try:
+        report = await ProgramIndexer(vector_store).reconcile(fix=fix)
+        print(json.dumps(report, indent=2))
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="Re-index missing and stale programs, remove orphans")
+    args = parser.parse_args()
+    asyncio.run(main(args.fix))
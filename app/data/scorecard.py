@@ -0,0 +1,189 @@
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+import aiohttp
+import asyncio
+from datetime import datetime
+import hashlib
+import json
+import math
+import os
+import random
+
+class ScorecardCursor:
+    """Tracks completed pages of a crawl on disk so an interrupted crawl can resume"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.query_key: Optional[str] = None
+        self.total_pages: Optional[int] = None
+        self.completed: Set[int] = set()
+        self.started_at: Optional[str] = None  # ISO time the crawl's first page was requested
+
+    def load(self, query_key: str) -> bool:
+        """Load saved state for this query. Returns True if resuming a previous crawl."""
+        self.query_key = query_key
+        self.total_pages = None
+        self.completed = set()
+        self.started_at = None
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+        if state.get("query_key") != query_key:
+            return False
+        self.total_pages = state.get("total_pages")
+        self.completed = set(state.get("completed", []))
+        self.started_at = state.get("started_at")
+        return bool(self.completed)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "query_key": self.query_key,
+                "total_pages": self.total_pages,
+                "completed": sorted(self.completed),
+                "started_at": self.started_at
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def mark_done(self, page: int):
+        """Record a page as fully processed; clears the cursor once every page is done"""
+        self.completed.add(page)
+        if self.total_pages is not None and len(self.completed) >= self.total_pages:
+            self.clear()
+        else:
+            self.save()
+
+    def clear(self):
+        self.total_pages = None
+        self.completed = set()
+        self.started_at = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+class ScorecardClient:
+    """Paginated College Scorecard crawler with a shared session, bounded concurrency and retries"""
+
+    def __init__(
+        self,
+        api_key: str,
+        api_endpoint: str,
+        per_page: int = 100,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        cursor_path: str = "./scorecard_cursor.json"
+    ):
+        self.api_key = api_key
+        self.api_endpoint = api_endpoint
+        self.per_page = per_page
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.cursor = ScorecardCursor(cursor_path)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.resumed = False
+        self.crawl_started_at: Optional[datetime] = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            timeout=aiohttp.ClientTimeout(total=60)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Honor Retry-After when the server sends it, otherwise back off exponentially with jitter"""
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_seconds * (2 ** attempt) + random.uniform(0, self.backoff_seconds)
+
+    async def fetch_page(self, params: Dict, page: int) -> Dict:
+        """Fetch one page, retrying rate-limited (429), server and connection errors"""
+        request_params = {**params, "api_key": self.api_key, "per_page": self.per_page, "page": page}
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self.session.get(self.api_endpoint, params=request_params) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    error_text = await response.text()
+                    if response.status != 429 and response.status < 500:
+                        raise RuntimeError(f"Scorecard API error {response.status}: {error_text}")
+                    retry_after = response.headers.get("Retry-After")
+                    print(f"Scorecard page {page}: status {response.status} (attempt {attempt + 1})")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Scorecard page {page}: {type(e).__name__} {str(e)} (attempt {attempt + 1})")
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._retry_delay(attempt, retry_after))
+
+        raise RuntimeError(f"Scorecard page {page} failed after {self.max_retries + 1} attempts")
+
+    def _query_key(self, params: Dict) -> str:
+        payload = json.dumps({**params, "per_page": self.per_page}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def iter_pages(self, params: Dict) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """
+        Yield (page, schools) for every page not completed by a previous crawl.
+        
+        At most max_concurrency pages are in flight; pages are yielded as they
+        arrive. Callers must call mark_page_done once a page is processed.
+        """
+        self.resumed = self.cursor.load(self._query_key(params))
+        if self.resumed:
+            print(f"Resuming crawl: {len(self.cursor.completed)}/{self.cursor.total_pages} pages already done")
+
+        yielded_pages = set()
+        if self.cursor.total_pages is None:
+            self.cursor.started_at = datetime.utcnow().isoformat()
+            data = await self.fetch_page(params, 0)
+            total = data.get("metadata", {}).get("total", 0)
+            self.cursor.total_pages = max(1, math.ceil(total / self.per_page))
+            self.cursor.save()
+            print(f"Crawling {total} schools across {self.cursor.total_pages} pages")
+            yielded_pages.add(0)
+            yield 0, data.get("results", [])
+
+        # Cursors saved before start times were recorded have none
+        self.crawl_started_at = datetime.fromisoformat(self.cursor.started_at) if self.cursor.started_at else None
+
+        remaining = iter([
+            page for page in range(self.cursor.total_pages)
+            if page not in self.cursor.completed and page not in yielded_pages
+        ])
+        in_flight: Dict[asyncio.Task, int] = {}
+        try:
+            while True:
+                while len(in_flight) < self.max_concurrency:
+                    page = next(remaining, None)
+                    if page is None:
+                        break
+                    in_flight[asyncio.create_task(self.fetch_page(params, page))] = page
+                if not in_flight:
+                    break
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = in_flight.pop(task)
+                    yield page, task.result().get("results", [])
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    def mark_page_done(self, page: int):
+        """Persist that a page has been fully processed"""
+        self.cursor.mark_done(page)
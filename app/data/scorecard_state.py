@@ -0,0 +1,107 @@
+from typing import Dict, List, Set
+from datetime import datetime
+import hashlib
+import json
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.data.program_repository import delete_program_rows, get_program_ids
+from app.models.ingestion import ProgramTombstoneDB, ScorecardSchoolDB
+
+def compute_school_hash(school: Dict) -> str:
+    """Hash a school's raw Scorecard payload to detect changes between crawls"""
+    payload = json.dumps(school, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def load_school_hashes(db: AsyncSession) -> Dict[str, str]:
+    """Stored payload hash of every known school"""
+    result = await db.execute(select(ScorecardSchoolDB.school_id, ScorecardSchoolDB.content_hash))
+    return dict(result.all())
+
+async def save_school_states(
+    db: AsyncSession,
+    changed: List[Dict],
+    unchanged_ids: List[str],
+    seen_at: datetime
+):
+    """
+    Record the schools of a crawled batch. The caller owns the transaction.
+
+    changed rows (school_id, content_hash, program_ids) are inserted or
+    replaced; unchanged schools only have their last_seen_at bumped.
+    """
+    if changed:
+        ids = [row["school_id"] for row in changed]
+        existing = set((await db.execute(
+            select(ScorecardSchoolDB.school_id).where(ScorecardSchoolDB.school_id.in_(ids))
+        )).scalars())
+        rows = [{**row, "last_seen_at": seen_at} for row in changed]
+        new_rows = [row for row in rows if row["school_id"] not in existing]
+        updated_rows = [row for row in rows if row["school_id"] in existing]
+        if new_rows:
+            await db.execute(insert(ScorecardSchoolDB), new_rows)
+        if updated_rows:
+            await db.execute(update(ScorecardSchoolDB), updated_rows)
+    if unchanged_ids:
+        await db.execute(
+            update(ScorecardSchoolDB)
+            .where(ScorecardSchoolDB.school_id.in_(unchanged_ids))
+            .values(last_seen_at=seen_at)
+        )
+
+async def apply_tombstones(
+    db: AsyncSession,
+    crawl_started_at: datetime,
+    missed_runs_limit: int,
+    batch_size: int = 1000
+) -> Dict[str, int]:
+    """
+    Count a completed crawl against Scorecard programs it did not produce.
+
+    A program is missing if no school seen since crawl_started_at produced
+    it. Each complete crawl it is missing from increments its counter; at
+    missed_runs_limit it is deleted (and so removed from the vector index
+    through the outbox) in batches, and its tombstone row is kept as a
+    record. Programs that reappear have their counter dropped, and schools
+    the crawl did not see lose their sync state.
+    """
+    now = datetime.utcnow()
+    expected: Set[str] = set()
+    for (program_ids,) in (await db.execute(
+        select(ScorecardSchoolDB.program_ids).where(ScorecardSchoolDB.last_seen_at >= crawl_started_at)
+    )).all():
+        expected.update(program_ids or [])
+    missing = set(await get_program_ids(db, source="scorecard")) - expected
+
+    # Forget schools gone from the source, so one that comes back is reprocessed
+    await db.execute(delete(ScorecardSchoolDB).where(ScorecardSchoolDB.last_seen_at < crawl_started_at))
+
+    tombstones = {
+        tombstone.program_id: tombstone
+        for tombstone in (await db.execute(select(ProgramTombstoneDB))).scalars()
+    }
+    # Programs back in the source (including ones deleted earlier) start over
+    returned = [program_id for program_id in tombstones if program_id in expected]
+    for start in range(0, len(returned), batch_size):
+        await db.execute(
+            delete(ProgramTombstoneDB).where(ProgramTombstoneDB.program_id.in_(returned[start:start + batch_size]))
+        )
+
+    expired: List[str] = []
+    for program_id in missing:
+        tombstone = tombstones.get(program_id)
+        if tombstone is None:
+            tombstone = ProgramTombstoneDB(program_id=program_id, missed_runs=0, first_missed_at=now)
+            db.add(tombstone)
+        tombstone.missed_runs += 1
+        if tombstone.missed_runs >= missed_runs_limit:
+            tombstone.tombstoned_at = now
+            expired.append(program_id)
+    await db.commit()
+
+    deleted = 0
+    for start in range(0, len(expired), batch_size):
+        deleted += await delete_program_rows(db, expired[start:start + batch_size])
+        await db.commit()
+
+    return {"missing": len(missing) - len(expired), "tombstoned": deleted}
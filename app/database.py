@@ -1,18 +1,86 @@
-from sqlalchemy import create_engine
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from app.config import settings
 
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./grad_admissions.db")
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def sqlite_pragmas() -> Dict[str, object]:
+    """SQLite pragmas applied to every new connection, from Settings"""
+    return {
+        # WAL lets readers proceed while a write is in progress
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        # NORMAL is durable across application crashes in WAL mode and avoids an fsync per commit
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+
+def install_sqlite_pragmas(engine: Engine, pragmas: Dict[str, object]):
+    """Apply pragmas whenever the engine opens a new SQLite connection"""
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def create_db_engine(url: str, pragmas: Optional[Dict[str, object]] = None) -> Engine:
+    """Create an engine tuned for the database backend"""
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        install_sqlite_pragmas(engine, sqlite_pragmas() if pragmas is None else pragmas)
+        return engine
+
+    return create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS
+    )
+
+# Async drivers used when DATABASE_URL names only the database backend
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
+
+def to_async_url(url: str) -> str:
+    """Swap a synchronous database URL to its async driver, e.g. sqlite:// -> sqlite+aiosqlite://"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def create_async_db_engine(url: str, pragmas: Optional[Dict[str, object]] = None) -> AsyncEngine:
+    """Create an async engine with the same tuning as create_db_engine"""
+    async_url = to_async_url(url)
+    if async_url.startswith("sqlite"):
+        engine = create_async_engine(async_url)
+        install_sqlite_pragmas(engine.sync_engine, sqlite_pragmas() if pragmas is None else pragmas)
+        return engine
+
+    return create_async_engine(
+        async_url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS
+    )
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine(SQLALCHEMY_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -22,5 +90,13 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_db_and_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    # Import models so their tables are registered on Base.metadata
+    from app.models import conversation, ingestion, program, vector_index  # noqa: F401
+    from app.migrations import run_migrations
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
@@ -1,42 +1,97 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-import uvicorn
-import os
+from fastapi.responses import FileResponse, JSONResponse
 import asyncio
+import time
 from pathlib import Path
 from contextlib import asynccontextmanager
 
-from app.data.program_pipeline import ProgramDataPipeline
 from app.config import settings
-from app.routers import programs, chat
-from app.database import create_db_and_tables
-from app.ai.rag_manager import RAGManager
-from app.ai.vector_store import VectorStore
-from app.ai.llm import LLMService
-
-# Initialize services
-vector_store = VectorStore()
-rag_manager = RAGManager()
-llm_service = LLMService()
-program_pipeline = ProgramDataPipeline(vector_store)
+from app.routers import admin, programs, chat
+from app.database import async_engine, create_db_and_tables
+from app.services import ServiceContainer
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Start program data update task
-    update_task = asyncio.create_task(program_pipeline.schedule_updates(interval_hours=24))
-    print("🔄 Started program data update scheduler")
+    """
+    Open existing indexes and start serving; everything slow runs in the background.
+    
+    Model warm-up, outbox indexing and the program refresh (only when the
+    data is stale) start as tasks after the startup phases; /ready reports
+    when the vector index is warm.
+    """
+    timings = {}
+    startup_started = time.perf_counter()
+    try:
+        print("🚀 Starting service initialization...")
+        
+        # Initialize database
+        print("Initializing database...")
+        phase_started = time.perf_counter()
+        create_db_and_tables()
+        timings["database"] = round(time.perf_counter() - phase_started, 3)
+        print(f"✅ Database initialized ({timings['database']:.2f}s)")
+        
+        # Verify LLM service configuration
+        print("Verifying LLM service...")
+        if settings.LLM_BACKEND == "groq" and not settings.GROQ_API_KEY:
+            raise ValueError("GROQ_API_KEY environment variable not set")
+        print("✅ LLM service verified")
+        
+        # Create the shared service container and open the existing vector index
+        print("Initializing vector store and RAG system...")
+        phase_started = time.perf_counter()
+        services = ServiceContainer()
+        await services.initialize()
+        app.state.services = services
+        timings["services"] = round(time.perf_counter() - phase_started, 3)
+        print(f"✅ Vector store and RAG system initialized ({timings['services']:.2f}s)")
+        
+    except Exception as e:
+        error_msg = f"❌ Error during initialization: {str(e)}"
+        print(error_msg)
+        # Log the full error for debugging
+        import traceback
+        print("Detailed error:")
+        print(traceback.format_exc())
+        raise
+
+    timings["startup"] = round(time.perf_counter() - startup_started, 3)
+    services.startup_timings.update(timings)
+    print(f"✅ All services initialized successfully ({timings['startup']:.2f}s)")
+
+    tasks = [
+        # Load the embedding model so the first search does not pay for it
+        asyncio.create_task(services.warm_up()),
+        # Apply SQL program changes to the vector index
+        asyncio.create_task(services.program_indexer.run()),
+        # Refresh program data now if stale, then on the regular interval, in one worker at a time
+        asyncio.create_task(services.ingestion_scheduler.run()),
+        # Follow collection swaps made by other workers
+        asyncio.create_task(services.index_versions.watch()),
+        # Delete expired conversations
+        asyncio.create_task(
+            services.conversation_manager.run_sweeper(settings.CONVERSATION_SWEEP_INTERVAL_SECONDS)
+        )
+    ]
+    if settings.INDEX_AUTO_REBUILD:
+        # Rebuild into a new collection if the model or document format changed
+        tasks.append(asyncio.create_task(services.index_versions.rebuild_if_outdated()))
+    print("🔄 Started warm-up, program indexer and program data update scheduler")
     
     yield  # Run the application
     
-    # Cancel update task on shutdown
-    update_task.cancel()
-    try:
-        await update_task
-    except asyncio.CancelledError:
-        pass
-    print("✅ Stopped program data updates")
+    # Cancel background tasks on shutdown
+    print("🛑 Shutting down services...")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print("✅ Stopped background tasks")
+
+    await services.close()
+    await async_engine.dispose()
+    print("✅ Shutdown complete")
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -64,6 +119,7 @@ app.mount("/static", StaticFiles(directory=static_path), name="static")
 # Include routers with prefixes
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(programs.router, prefix="/api/programs", tags=["programs"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 # Health check endpoint
 @app.get("/health")
@@ -71,6 +127,17 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/ready")
+async def readiness_check(request: Request):
+    """Readiness probe: 503 until the vector index is warm"""
+    readiness = await request.app.state.services.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+@app.get("/metrics")
+async def metrics(request: Request):
+    """Cache, ingestion and indexing counters for this worker"""
+    return await request.app.state.services.metrics()
+
 # Redirect root to static index.html
 @app.get("/")
 async def root():
@@ -79,60 +146,9 @@ async def root():
         raise HTTPException(status_code=404, detail="index.html not found")
     return FileResponse(index_path)
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize all services on startup"""
-    try:
-        print("🚀 Starting service initialization...")
-        
-        # Initialize database
-        print("Initializing database...")
-        create_db_and_tables()
-        print("✅ Database initialized")
-        
-        # Initialize vector store
-        print("Initializing vector store...")
-        await vector_store.initialize()
-        print("✅ Vector store initialized")
-        
-        # Initialize RAG manager
-        print("Initializing RAG system...")
-        await rag_manager.initialize()
-        print("✅ RAG system initialized")
-        
-        # Perform initial program data update
-        print("Fetching initial program data...")
-        await program_pipeline.update_program_database()
-        print("✅ Program data initialized")
-        
-        # Verify LLM service configuration
-        print("Verifying LLM service...")
-        if not os.getenv("GROQ_API_KEY"):
-            raise ValueError("GROQ_API_KEY environment variable not set")
-        print("✅ LLM service verified")
-        
-        print("✅ All services initialized successfully")
-        
-    except Exception as e:
-        error_msg = f"❌ Error during initialization: {str(e)}"
-        print(error_msg)
-        # Log the full error for debugging
-        import traceback
-        print("Detailed error:")
-        print(traceback.format_exc())
-        raise
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    try:
-        print("🛑 Shutting down services...")
-        # Add any cleanup code here if needed
-        print("✅ Shutdown complete")
-    except Exception as e:
-        print(f"❌ Error during shutdown: {str(e)}")
-
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "app.main:app", 
         host="0.0.0.0", 
@@ -0,0 +1,76 @@
+from typing import Callable, List, Tuple
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+# Tracks applied versions; kept off Base.metadata so create_all never touches it
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Indexes as of migration 1; later index changes need their own migration
+PROGRAM_INDEXES_V1 = [
+    ("ix_programs_tuition", ("tuition",)),
+    ("ix_programs_updated_at", ("updated_at",)),
+    ("ix_programs_university_id", ("university", "id")),
+    ("ix_programs_degree_type_id", ("degree_type", "id")),
+    ("ix_programs_degree_type_funding_id", ("degree_type", "funding_available", "id")),
+]
+
+def create_program_indexes(conn: Connection):
+    """Add the Program secondary indexes to databases created before they existed"""
+    for name, columns in PROGRAM_INDEXES_V1:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON programs ({', '.join(columns)})"))
+
+def add_program_sync_columns(conn: Connection):
+    """Add the location, source and content_hash columns used by the vector index write path"""
+    existing = {column["name"] for column in inspect(conn).get_columns("programs")}
+    for name in ("location", "source", "content_hash"):
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE programs ADD COLUMN {name} VARCHAR"))
+    conn.execute(text("UPDATE programs SET source = 'api' WHERE source IS NULL"))
+
+def add_ingestion_run_mode(conn: Connection):
+    """Record whether a refresh was incremental or a full rebuild"""
+    if not inspect(conn).has_table("ingestion_runs"):
+        # Created with the column by create_all
+        return
+    existing = {column["name"] for column in inspect(conn).get_columns("ingestion_runs")}
+    if "mode" not in existing:
+        conn.execute(text("ALTER TABLE ingestion_runs ADD COLUMN mode VARCHAR"))
+    conn.execute(text("UPDATE ingestion_runs SET mode = 'full' WHERE mode IS NULL"))
+
+# Append-only: never edit or reorder an applied migration, add a new version instead
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Index program filter and sort columns", create_program_indexes),
+    (2, "Add program location, source and content_hash columns", add_program_sync_columns),
+    (3, "Add ingestion run mode column", add_ingestion_run_mode),
+]
+
+def run_migrations(engine: Engine):
+    """Apply pending migrations in version order, each in its own transaction"""
+    migration_metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=version,
+                    description=description,
+                    applied_at=datetime.utcnow()
+                ))
+            print(f"✅ Applied migration {version}: {description}")
+        except IntegrityError:
+            # Another worker applied this version concurrently
+            print(f"Migration {version} already applied by another worker")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, JSON, DateTime
+from sqlalchemy import Column, String, JSON, DateTime, Integer, Text, ForeignKey
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
@@ -29,4 +29,24 @@ class ConversationDB(Base):
     history = Column(JSON, default=list)
     user_metadata = Column(JSON, default=dict)  # Changed from metadata to user_metadata
     created_at = Column(DateTime, default=datetime.utcnow)
-    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ConversationMessageDB(Base):
+    """Append-only message rows; history is read back ordered by id"""
+    __tablename__ = "conversation_messages"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    conversation_id = Column(String, ForeignKey("conversations.id"), nullable=False, index=True)
+    role = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ConversationSummaryDB(Base):
+    """Running summary of the messages up to and including summarized_through"""
+    __tablename__ = "conversation_summaries"
+
+    conversation_id = Column(String, ForeignKey("conversations.id"), primary_key=True)
+    summary = Column(Text, nullable=False)
+    summarized_through = Column(Integer, nullable=False, default=0)  # Last folded message id
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
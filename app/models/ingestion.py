@@ -0,0 +1,77 @@
+from sqlalchemy import Column, String, JSON, DateTime, Integer, Text
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+from app.database import Base
+
+class SchedulerLeaseDB(Base):
+    """One row per scheduled job; the worker holding an unexpired lease runs the job"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    acquired_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class IngestionRunDB(Base):
+    """History of program data refreshes"""
+    __tablename__ = "ingestion_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    holder = Column(String, nullable=False)  # Worker that ran it
+    trigger = Column(String, nullable=False)  # "scheduled" or "manual"
+    mode = Column(String, default="incremental")  # "incremental" or "full"
+    status = Column(String, nullable=False, index=True)  # "running", "succeeded", "failed", "cancelled" or "abandoned"
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime)
+    counts = Column(JSON)
+    error = Column(Text)
+
+class ScorecardSchoolDB(Base):
+    """Incremental sync state of one Scorecard school"""
+    __tablename__ = "scorecard_schools"
+
+    school_id = Column(String, primary_key=True)
+    content_hash = Column(String, nullable=False)  # Hash of the school's raw API payload
+    program_ids = Column(JSON, default=list)  # Programs the payload produced
+    last_seen_at = Column(DateTime, nullable=False, index=True)
+
+class ProgramTombstoneDB(Base):
+    """A Scorecard program missing from the source; deleted once missing for enough consecutive crawls"""
+    __tablename__ = "program_tombstones"
+
+    program_id = Column(String, primary_key=True)
+    missed_runs = Column(Integer, default=0, nullable=False)
+    first_missed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    tombstoned_at = Column(DateTime)  # Set when the program was deleted
+
+# Pydantic models for API
+class IngestionRun(BaseModel):
+    id: int
+    holder: str
+    trigger: str
+    mode: Optional[str] = None
+    status: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    counts: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class IngestionLease(BaseModel):
+    holder: str
+    acquired_at: datetime
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class IngestionStatus(BaseModel):
+    worker_id: str
+    running: bool
+    lease: Optional[IngestionLease] = None
+    next_run_in_seconds: Optional[float] = None
+    runs: List[IngestionRun] = []
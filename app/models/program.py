@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Float, Boolean, JSON, DateTime
+from sqlalchemy import Column, String, Float, Boolean, JSON, DateTime, Index, Integer
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 from app.database import Base
 
@@ -11,22 +11,43 @@ class Program(Base):
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False)
     university = Column(String, nullable=False)
+    location = Column(String)  # e.g., "Austin, TX"
     department = Column(String, nullable=False)
     degree_type = Column(String, nullable=False)  # e.g., "Masters", "PhD", "Both"
     description = Column(String, nullable=False)
     requirements = Column(JSON, nullable=False)  # Store as JSON
     research_areas = Column(JSON, nullable=False)  # Store as array in JSON
     application_deadlines = Column(JSON)  # Store as JSON
-    tuition = Column(Float)
+    tuition = Column(Float, index=True)
     funding_available = Column(Boolean, default=False)
     contact_info = Column(JSON)  # Store as JSON
+    source = Column(String, default="api")  # "api" or "scorecard"
+    content_hash = Column(String)  # Hash of the content columns, for change detection
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        # /api/programs filters; ending each index in id lets keyset pages
+        # (ORDER BY id) read matching rows in order instead of sorting them
+        Index("ix_programs_university_id", "university", "id"),
+        Index("ix_programs_degree_type_id", "degree_type", "id"),
+        Index("ix_programs_degree_type_funding_id", "degree_type", "funding_available", "id"),
+    )
+
+class ProgramChangeDB(Base):
+    """Outbox of program writes, drained into the vector index by ProgramIndexer"""
+    __tablename__ = "program_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    program_id = Column(String, nullable=False, index=True)
+    operation = Column(String, nullable=False)  # "upsert" or "delete"
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 # Pydantic models for API
 class ProgramBase(BaseModel):
     name: str
     university: str
+    location: Optional[str] = None
     department: str
     degree_type: str
     description: str
@@ -40,10 +61,26 @@ class ProgramBase(BaseModel):
 class ProgramCreate(ProgramBase):
     pass
 
+class ProgramImport(ProgramCreate):
+    """NDJSON import row; rows without an id are created with a new one"""
+    id: Optional[str] = None
+
+class ProgramImportResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = []
+
 class ProgramResponse(ProgramBase):
     id: str
     created_at: datetime
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProgramPage(BaseModel):
+    """One page of programs; pass next_cursor back as cursor to get the next page"""
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
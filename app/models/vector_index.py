@@ -0,0 +1,41 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+from app.database import Base
+
+class VectorIndexVersionDB(Base):
+    """A Chroma collection holding one build of the program index; exactly one is active"""
+    __tablename__ = "vector_index_versions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    collection_name = Column(String, nullable=False, unique=True)
+    status = Column(String, nullable=False, index=True)  # "building", "active", "retired", "dropped" or "failed"
+    embedding_model = Column(String, nullable=False)
+    document_format = Column(Integer, nullable=False)  # VectorStore.DOCUMENT_FORMAT_VERSION it was built with
+    program_count = Column(Integer)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    activated_at = Column(DateTime)
+
+# Pydantic models for API
+class VectorIndexVersion(BaseModel):
+    id: int
+    collection_name: str
+    status: str
+    embedding_model: str
+    document_format: int
+    program_count: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    activated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class VectorIndexStatus(BaseModel):
+    active: Optional[VectorIndexVersion] = None
+    outdated: bool
+    rebuilding: bool
+    versions: List[VectorIndexVersion] = []
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import JSONResponse
+from typing import Optional
+import hmac
+
+from app.config import settings
+from app.models.ingestion import IngestionLease, IngestionRun, IngestionStatus
+from app.models.vector_index import VectorIndexStatus, VectorIndexVersion
+from app.services import ServiceContainer, get_services
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Check the X-Admin-Token header; without ADMIN_TOKEN the admin API is closed unless explicitly opened"""
+    if not settings.ADMIN_TOKEN:
+        if settings.ADMIN_ALLOW_UNAUTHENTICATED:
+            return
+        raise HTTPException(status_code=403, detail="Admin API is disabled; set ADMIN_TOKEN to enable it")
+    if not hmac.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/ingestion", response_model=IngestionStatus)
+async def get_ingestion_status(
+    limit: int = Query(20, ge=1, le=100),
+    services: ServiceContainer = Depends(get_services)
+):
+    """Current refresh lease holder, when the next refresh is due and recent runs"""
+    scheduler = services.ingestion_scheduler
+    lease = await scheduler.get_lease()
+    return IngestionStatus(
+        worker_id=scheduler.worker_id,
+        running=scheduler.running,
+        lease=IngestionLease.model_validate(lease) if lease else None,
+        next_run_in_seconds=await scheduler.seconds_until_due(),
+        runs=[IngestionRun.model_validate(run) for run in await scheduler.get_runs(limit)]
+    )
+
+@router.post("/ingestion/runs", response_model=IngestionRun, status_code=202)
+async def trigger_ingestion(
+    full: bool = Query(False, description="Reprocess every school instead of only changed ones"),
+    services: ServiceContainer = Depends(get_services)
+):
+    """Start a program data refresh now, unless one is already running in any worker"""
+    scheduler = services.ingestion_scheduler
+    run_id = await scheduler.trigger("manual", full=full)
+    if run_id is None:
+        lease = await scheduler.get_lease()
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "A program data refresh is already running",
+                "holder": lease.holder if lease else None
+            }
+        )
+    return await scheduler.get_run(run_id)
+
+@router.get("/ingestion/runs/{run_id}", response_model=IngestionRun)
+async def get_ingestion_run(run_id: int, services: ServiceContainer = Depends(get_services)):
+    """Get a single refresh run"""
+    run = await services.ingestion_scheduler.get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+@router.get("/index", response_model=VectorIndexStatus)
+async def get_index_status(services: ServiceContainer = Depends(get_services)):
+    """Active vector index collection and every version built"""
+    index_versions = services.index_versions
+    active = await index_versions.get_active()
+    return VectorIndexStatus(
+        active=VectorIndexVersion.model_validate(active) if active else None,
+        outdated=index_versions.is_outdated(active) if active else False,
+        rebuilding=index_versions.rebuilding,
+        versions=[VectorIndexVersion.model_validate(version) for version in await index_versions.get_versions()]
+    )
+
+@router.post("/index/rebuild", status_code=202)
+async def rebuild_index(services: ServiceContainer = Depends(get_services)):
+    """Build a new collection from the programs table in the background and switch to it when done"""
+    version_id = await services.index_versions.start_rebuild()
+    if version_id is None:
+        raise HTTPException(status_code=409, detail="A vector index rebuild is already running")
+    return {"version_id": version_id, "status": "building"}
+
+@router.post("/index/rollback", response_model=VectorIndexVersion)
+async def rollback_index(services: ServiceContainer = Depends(get_services)):
+    """Switch back to the previously active collection"""
+    try:
+        version = await services.index_versions.rollback()
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if version is None:
+        raise HTTPException(status_code=409, detail="A vector index rebuild is already running")
+    return version
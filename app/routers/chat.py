@@ -1,19 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import AsyncIterator, List, Optional, Dict
 from datetime import datetime
 import json
-from sqlalchemy.orm import Session
+import time
+import uuid
 
-from app.ai.rag_manager import RAGManager
-from app.ai.llm import LLMService
-from app.ai.context import ConversationManager
-from app.database import get_db
+from app.ai.vector_store import SearchFilters
+from app.services import ServiceContainer, get_services
+from app.utils.locations import parse_state_codes
 
 router = APIRouter()
-rag_manager = RAGManager()
-conversation_manager = ConversationManager()
-llm_service = LLMService()
 
 class ChatMessage(BaseModel):
     content: str
@@ -25,6 +23,8 @@ class ProgramQuery(BaseModel):
     locations: List[str] = Field(..., description="Preferred geographic locations")
     degree_type: str = Field(..., description="Desired degree type (e.g., MS, PhD)")
     research_areas: List[str] = Field(..., description="Specific research areas of interest")
+    max_annual_cost: Optional[float] = Field(None, description="Maximum annual cost of attendance in USD")
+    min_admission_rate: Optional[float] = Field(None, description="Minimum overall admission rate (0-1)")
 
 async def format_student_profile(query: ProgramQuery) -> Dict:
     """Format student profile for LLM consumption"""
@@ -36,8 +36,27 @@ async def format_student_profile(query: ProgramQuery) -> Dict:
         "research_areas": query.research_areas
     }
 
+def build_search_filters(query: ProgramQuery) -> SearchFilters:
+    """Translate structured preferences into vector store filters"""
+    degree = query.degree_type.lower().replace(".", "")
+    degree_levels = []
+    if any(word in degree for word in ("master", "ms", "meng", "mcs")):
+        degree_levels.append(5)  # Scorecard credential level: Master's
+    if any(word in degree for word in ("phd", "doctor")):
+        degree_levels.append(6)  # Scorecard credential level: Doctoral
+
+    return SearchFilters(
+        states=parse_state_codes(query.locations) or None,
+        degree_levels=degree_levels or None,
+        max_annual_cost=query.max_annual_cost,
+        min_admission_rate=query.min_admission_rate
+    )
+
 @router.post("/recommend")
-async def recommend_programs(query: ProgramQuery, db: Session = Depends(get_db)):
+async def recommend_programs(
+    query: ProgramQuery,
+    services: ServiceContainer = Depends(get_services)
+):
     """Generate personalized program recommendations"""
     try:
         # Format student profile
@@ -52,22 +71,25 @@ async def recommend_programs(query: ProgramQuery, db: Session = Depends(get_db))
         Research areas: {', '.join(query.research_areas)}
         """
         
-        # Get relevant programs using RAG
-        rag_response = await rag_manager.get_rag_response(
+        # Get relevant programs (retrieval only; the recommendation is the single LLM call)
+        retrieved = await services.rag_manager.retrieve_context(
             query=search_query,
-            n_results=10
+            n_results=10,
+            filters=build_search_filters(query),
+            # Only the subjects are matched against program titles, not the template labels
+            keyword_query=" ".join(query.interests + query.research_areas)
         )
         
         # Generate personalized recommendations using LLM
-        recommendations = await llm_service.generate_program_recommendation(
+        recommendations = await services.llm_service.generate_program_recommendation(
             student_profile=student_profile,
-            matching_programs=rag_response.get("relevant_programs", [])
+            matching_programs=retrieved["relevant_programs"]
         )
         
         # Structure the response
         response = {
             "recommendations": recommendations,
-            "matching_programs": rag_response.get("relevant_programs", []),
+            "matching_programs": retrieved["relevant_programs"],
             "metadata": {
                 "timestamp": datetime.utcnow().isoformat(),
                 "query_parameters": student_profile
@@ -81,35 +103,55 @@ async def recommend_programs(query: ProgramQuery, db: Session = Depends(get_db))
         print(f"Error details: {error_msg}")
         raise HTTPException(status_code=500, detail=error_msg)
 
+async def prepare_chat_turn(
+    services: ServiceContainer,
+    conversation_id: str,
+    content: str
+) -> Dict:
+    """Retrieve program context and pack it with recent history into the token budget"""
+    context = await services.conversation_manager.get_context(conversation_id, max_history=None)
+    if not context:
+        context = await services.conversation_manager.create_conversation(conversation_id)
+    
+    # Retrieve program context (no generation)
+    retrieved = await services.rag_manager.retrieve_context(query=content)
+    
+    prompt = services.context_builder.build(
+        query=content,
+        documents=retrieved["documents"],
+        history=context.get('history', []),
+        system_message_builder=services.llm_service.build_system_message,
+        summary=context.get('summary')
+    )
+    print(
+        f"Chat {conversation_id}: prompt of {prompt['token_count']} tokens "
+        f"({prompt['dropped_turns']} turns, {prompt['dropped_documents']} documents dropped)"
+    )
+    return {"relevant_programs": retrieved["relevant_programs"], **prompt}
+
 @router.post("/message")
-async def chat_message(message: ChatMessage, db: Session = Depends(get_db)):
+async def chat_message(
+    message: ChatMessage,
+    services: ServiceContainer = Depends(get_services)
+):
     """Handle chat messages with RAG and LLM integration"""
     try:
         # Get or create conversation context
         conversation_id = message.conversation_id or str(uuid.uuid4())
-        context = await conversation_manager.get_context(conversation_id)
-        if not context:
-            context = await conversation_manager.create_conversation(conversation_id)
+        prompt = await prepare_chat_turn(services, conversation_id, message.content)
         
-        # Get RAG-enhanced context
-        rag_response = await rag_manager.get_rag_response(
-            query=message.content,
-            conversation_context=context.get('history', [])
-        )
-        
-        # Generate LLM response with RAG context
-        messages = [{"role": "user", "content": message.content}]
-        llm_response = await llm_service.generate_response(
-            messages=messages,
-            context=rag_response.get("context")
+        # Generate a single LLM response from the budgeted history plus RAG context
+        llm_response = await services.llm_service.generate_response(
+            messages=prompt["messages"],
+            context=prompt["context"]
         )
         
         # Update conversation history
-        await conversation_manager.add_message(
+        await services.conversation_manager.add_message(
             conversation_id,
             {"role": "user", "content": message.content}
         )
-        await conversation_manager.add_message(
+        await services.conversation_manager.add_message(
             conversation_id,
             {"role": "assistant", "content": llm_response}
         )
@@ -117,10 +159,84 @@ async def chat_message(message: ChatMessage, db: Session = Depends(get_db)):
         return {
             "conversation_id": conversation_id,
             "response": llm_response,
-            "relevant_programs": rag_response.get("relevant_programs", [])
+            "relevant_programs": prompt["relevant_programs"],
+            "prompt_tokens": prompt["token_count"]
         }
         
     except Exception as e:
         error_msg = f"Chat error: {str(e)}"
         print(f"Error details: {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg)
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=error_msg)
+
+def format_sse(data: Dict, event: Optional[str] = None) -> str:
+    """Format a payload as a server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/message/stream")
+async def chat_message_stream(
+    message: ChatMessage,
+    services: ServiceContainer = Depends(get_services)
+):
+    """Stream a chat response as server-sent events while tokens are generated"""
+    started = time.perf_counter()
+    conversation_id = message.conversation_id or str(uuid.uuid4())
+    try:
+        prompt = await prepare_chat_turn(services, conversation_id, message.content)
+    except Exception as e:
+        error_msg = f"Chat error: {str(e)}"
+        print(f"Error details: {error_msg}")
+        raise HTTPException(status_code=500, detail=error_msg)
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield format_sse(
+            {
+                "conversation_id": conversation_id,
+                "relevant_programs": prompt["relevant_programs"],
+                "prompt_tokens": prompt["token_count"]
+            },
+            event="meta"
+        )
+
+        tokens = []
+        first_token_at = None
+        try:
+            async for token in services.llm_service.stream_response(
+                messages=prompt["messages"],
+                context=prompt["context"]
+            ):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                tokens.append(token)
+                yield format_sse({"token": token})
+        except Exception as e:
+            print(f"Error details: Chat stream error: {str(e)}")
+            yield format_sse({"detail": f"Chat stream error: {str(e)}"}, event="error")
+            return
+
+        llm_response = "".join(tokens)
+        await services.conversation_manager.add_message(
+            conversation_id,
+            {"role": "user", "content": message.content}
+        )
+        await services.conversation_manager.add_message(
+            conversation_id,
+            {"role": "assistant", "content": llm_response}
+        )
+
+        finished = time.perf_counter()
+        timings = {
+            "time_to_first_token_ms": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+            "total_latency_ms": round((finished - started) * 1000, 1)
+        }
+        print(
+            f"Chat stream {conversation_id}: "
+            f"ttft={timings['time_to_first_token_ms']}ms total={timings['total_latency_ms']}ms"
+        )
+        yield format_sse({"conversation_id": conversation_id, **timings}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
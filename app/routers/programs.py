@@ -1,34 +1,218 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import AsyncIterator, Dict, List, Optional
+import base64
+import uuid
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models.program import Program, ProgramCreate, ProgramResponse
+from app.config import settings
+from app.data.program_repository import delete_program_rows, upsert_program_rows
+from app.database import AsyncSessionLocal, get_async_db
+from app.models.program import (
+    Program,
+    ProgramCreate,
+    ProgramImport,
+    ProgramImportResult,
+    ProgramPage,
+    ProgramResponse
+)
+from app.services import ServiceContainer, get_services
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ProgramResponse])
+PROGRAM_FIELDS = list(ProgramResponse.model_fields.keys())
+
+def encode_cursor(program_id: str) -> str:
+    return base64.urlsafe_b64encode(program_id.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        # validate=True rejects characters urlsafe_b64decode would silently drop
+        program_id = base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not program_id:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return program_id
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Validate a comma-separated field list; id is always included for paging"""
+    if not fields:
+        return PROGRAM_FIELDS
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in PROGRAM_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in requested if field != "id"]
+
+@router.get("/", response_model=ProgramPage)
 async def get_programs(
-    skip: int = 0,
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    university: Optional[str] = None,
+    degree_type: Optional[str] = None,
+    funding_available: Optional[bool] = None,
+    min_tuition: Optional[float] = None,
+    max_tuition: Optional[float] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,university"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get list of graduate programs"""
+    """Get a page of graduate programs ordered by id, using keyset pagination"""
+    selected = parse_fields(fields)
     try:
-        programs = db.query(Program).offset(skip).limit(limit).all()
-        return programs
+        # Only the requested columns are loaded
+        query = select(*[getattr(Program, field) for field in selected])
+        if university is not None:
+            query = query.where(Program.university == university)
+        if degree_type is not None:
+            query = query.where(Program.degree_type == degree_type)
+        if funding_available is not None:
+            query = query.where(Program.funding_available == funding_available)
+        if min_tuition is not None:
+            query = query.where(Program.tuition >= min_tuition)
+        if max_tuition is not None:
+            query = query.where(Program.tuition <= max_tuition)
+        if cursor:
+            query = query.where(Program.id > decode_cursor(cursor))
+
+        # Fetch one extra row to know whether another page exists
+        result = await db.execute(query.order_by(Program.id).limit(limit + 1))
+        rows = result.all()
+        items = [dict(row._mapping) for row in rows[:limit]]
+        next_cursor = encode_cursor(items[-1]["id"]) if len(rows) > limit else None
+        return ProgramPage(items=items, next_cursor=next_cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def iter_ndjson_lines(request: Request, max_line_bytes: int) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a streamed request body into lines without buffering the whole payload.
+
+    Only the current partial line is held, up to max_line_bytes; a longer
+    line is discarded as it arrives and yielded as None.
+    """
+    partial: List[bytes] = []
+    partial_size = 0
+    oversized = False
+    async for chunk in request.stream():
+        # Only the new chunk is split; the partial line is joined once it ends
+        *complete, tail = chunk.split(b"\n")
+        for piece in complete:
+            if oversized or partial_size + len(piece) > max_line_bytes:
+                yield None
+            else:
+                partial.append(piece)
+                yield b"".join(partial)
+            partial, partial_size, oversized = [], 0, False
+        if not oversized:
+            partial.append(tail)
+            partial_size += len(tail)
+            if partial_size > max_line_bytes:
+                partial, partial_size, oversized = [], 0, True
+    if oversized:
+        yield None
+    elif partial_size:
+        yield b"".join(partial)
+
+@router.post("/bulk", response_model=ProgramImportResult)
+async def import_programs(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Import programs from an NDJSON body (one ProgramCreate object per line, optionally with an id).
+    
+    Rows are upserted by id in chunks of PROGRAM_IMPORT_BATCH_SIZE, each in
+    its own transaction. Invalid lines are skipped and reported. Changed
+    rows reach the search index through the program indexer.
+    """
+    result = ProgramImportResult()
+    batch: List[Dict] = []
+
+    async def flush():
+        try:
+            counts = await upsert_program_rows(db, batch)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail=f"Import failed after {result.inserted + result.updated + result.unchanged} rows: {str(e)}"
+            )
+        services.program_indexer.notify()
+        result.inserted += counts["inserted"]
+        result.updated += counts["updated"]
+        result.unchanged += counts["unchanged"]
+        batch.clear()
+
+    line_number = 0
+    async for line in iter_ndjson_lines(request, settings.PROGRAM_IMPORT_MAX_LINE_BYTES):
+        line_number += 1
+        if line is None:
+            result.failed += 1
+            if len(result.errors) < 100:
+                result.errors.append({
+                    "line": line_number,
+                    "detail": f"Line exceeds {settings.PROGRAM_IMPORT_MAX_LINE_BYTES} bytes"
+                })
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = ProgramImport.model_validate_json(line).model_dump()
+        except ValidationError as e:
+            result.failed += 1
+            if len(result.errors) < 100:
+                result.errors.append({"line": line_number, "detail": e.errors(include_url=False)})
+            continue
+        row["id"] = row["id"] or str(uuid.uuid4())
+        batch.append(row)
+        if len(batch) >= settings.PROGRAM_IMPORT_BATCH_SIZE:
+            await flush()
+
+    if batch:
+        await flush()
+    return result
+
+@router.get("/export")
+async def export_programs():
+    """Stream every program as NDJSON, reading the table in keyset-ordered batches"""
+    async def rows() -> AsyncIterator[str]:
+        # The response outlives request-scoped dependencies, so use a dedicated session
+        async with AsyncSessionLocal() as db:
+            last_id = None
+            while True:
+                query = select(Program).order_by(Program.id).limit(settings.PROGRAM_EXPORT_BATCH_SIZE)
+                if last_id is not None:
+                    query = query.where(Program.id > last_id)
+                programs = (await db.execute(query)).scalars().all()
+                if not programs:
+                    return
+                yield "".join(
+                    ProgramResponse.model_validate(program).model_dump_json() + "\n"
+                    for program in programs
+                )
+                last_id = programs[-1].id
+                db.expunge_all()
+
+    return StreamingResponse(
+        rows(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=programs.ndjson"}
+    )
+
 @router.get("/{program_id}", response_model=ProgramResponse)
 async def get_program(
     program_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific program by ID"""
-    program = db.query(Program).filter(Program.id == program_id).first()
+    program = await db.get(Program, program_id)
     if not program:
         raise HTTPException(status_code=404, detail="Program not found")
     return program
@@ -36,55 +220,58 @@ async def get_program(
 @router.post("/", response_model=ProgramResponse)
 async def create_program(
     program: ProgramCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    services: ServiceContainer = Depends(get_services)
 ):
     """Create a new program"""
+    program_id = str(uuid.uuid4())
     try:
-        db_program = Program(**program.model_dump())
-        db.add(db_program)
-        db.commit()
-        db.refresh(db_program)
-        return db_program
+        await upsert_program_rows(db, [{"id": program_id, **program.model_dump()}])
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    services.program_indexer.notify()
+    return await db.get(Program, program_id)
 
 @router.put("/{program_id}", response_model=ProgramResponse)
 async def update_program(
     program_id: str,
     program_update: ProgramCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    services: ServiceContainer = Depends(get_services)
 ):
     """Update a program"""
-    db_program = db.query(Program).filter(Program.id == program_id).first()
+    db_program = await db.get(Program, program_id)
     if not db_program:
         raise HTTPException(status_code=404, detail="Program not found")
     
-    for key, value in program_update.model_dump().items():
-        setattr(db_program, key, value)
-    
     try:
-        db.commit()
-        db.refresh(db_program)
-        return db_program
+        await upsert_program_rows(db, [{"id": program_id, **program_update.model_dump()}])
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    services.program_indexer.notify()
+    await db.refresh(db_program)
+    return db_program
 
 @router.delete("/{program_id}")
 async def delete_program(
     program_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    services: ServiceContainer = Depends(get_services)
 ):
     """Delete a program"""
-    program = db.query(Program).filter(Program.id == program_id).first()
+    program = await db.get(Program, program_id)
     if not program:
         raise HTTPException(status_code=404, detail="Program not found")
     
     try:
-        db.delete(program)
-        db.commit()
-        return {"message": "Program deleted successfully"}
+        await delete_program_rows(db, [program_id])
+        await db.commit()
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    services.program_indexer.notify()
+    return {"message": "Program deleted successfully"}
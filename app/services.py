@@ -0,0 +1,103 @@
+from typing import Dict, Optional
+import time
+from fastapi import Request
+
+from app.ai.context import ConversationManager
+from app.ai.context_window import ContextWindowBuilder
+from app.ai.conversation_store import create_conversation_store
+from app.ai.llm import LLMService
+from app.ai.rag_manager import RAGManager
+from app.ai.summarizer import ConversationSummarizer
+from app.ai.vector_store import VectorStore
+from app.config import settings
+from app.data.index_versions import VectorIndexManager
+from app.data.ingestion_scheduler import IngestionScheduler
+from app.data.program_indexer import ProgramIndexer
+from app.data.program_pipeline import ProgramDataPipeline
+
+class ServiceContainer:
+    """Holds the heavy, process-wide services so each is created once per worker"""
+
+    def __init__(self):
+        self.vector_store = VectorStore()
+        self.llm_service = LLMService()
+        self.rag_manager = RAGManager(self.vector_store, self.llm_service)
+        self.conversation_manager = ConversationManager(
+            store=create_conversation_store(settings.CONVERSATION_STORE),
+            cache_size=settings.CONVERSATION_CACHE_SIZE,
+            ttl_hours=settings.CONVERSATION_TTL_HOURS,
+            summarizer=ConversationSummarizer(
+                self.llm_service,
+                trigger_messages=settings.SUMMARY_TRIGGER_MESSAGES,
+                keep_recent=settings.SUMMARY_KEEP_RECENT_MESSAGES
+            ) if settings.CONVERSATION_SUMMARIES_ENABLED else None
+        )
+        self.context_builder = ContextWindowBuilder(
+            token_budget=settings.CONTEXT_TOKEN_BUDGET,
+            document_share=settings.CONTEXT_DOCUMENT_SHARE
+        )
+        # SQL is the source of truth for programs; the indexer is the only vector store writer
+        self.index_versions = VectorIndexManager(self.vector_store)
+        self.program_indexer = ProgramIndexer(self.vector_store, self.index_versions)
+        self.program_pipeline = ProgramDataPipeline(self.program_indexer)
+        # Lets one worker at a time run the pipeline
+        self.ingestion_scheduler = IngestionScheduler(self.program_pipeline)
+        # Seconds spent in each startup phase, filled in by the app lifespan
+        self.startup_timings: Dict[str, float] = {}
+        self.warm_up_error: Optional[str] = None
+
+    async def initialize(self):
+        """Open the active vector index collection and prepare the RAG system"""
+        await self.index_versions.initialize()
+        await self.rag_manager.initialize()
+
+    async def warm_up(self):
+        """Load the embedding model in the background so startup does not wait for it"""
+        started = time.perf_counter()
+        try:
+            count = await self.vector_store.warm_up()
+            self.warm_up_error = None
+            self.startup_timings["warm_up"] = round(time.perf_counter() - started, 3)
+            print(f"✅ Vector index warm with {count} programs ({self.startup_timings['warm_up']:.2f}s)")
+        except Exception as e:
+            self.warm_up_error = str(e)
+            print(f"⚠️ Vector index warm-up failed: {str(e)}")
+
+    async def readiness(self) -> dict:
+        """Whether this worker can serve searches at full speed, and what it is still doing"""
+        last_refreshed = await self.ingestion_scheduler.last_finished_at(("succeeded",))
+        return {
+            "ready": self.vector_store.warm,
+            "vector_index": {
+                "warm": self.vector_store.warm,
+                "collection": self.vector_store.collection_name,
+                "rebuilding": self.index_versions.rebuilding,
+                "programs": await self.vector_store.get_program_count(),
+                "error": self.warm_up_error
+            },
+            "refresh": {
+                "running": self.ingestion_scheduler.running,
+                "last_completed_at": last_refreshed.isoformat() if last_refreshed else None
+            },
+            "pending_index_changes": (await self.program_indexer.lag_metrics())["pending_changes"],
+            "startup_timings": self.startup_timings
+        }
+
+    async def metrics(self) -> dict:
+        """Runtime counters of the shared services"""
+        return {
+            "embedding_cache": self.vector_store.embedding_cache.stats(),
+            "query_cache": self.rag_manager.query_cache.stats(),
+            "program_indexer": await self.program_indexer.lag_metrics()
+        }
+
+    async def close(self):
+        """Release network resources held by the services"""
+        await self.ingestion_scheduler.close()
+        await self.index_versions.close()
+        await self.conversation_manager.close()
+        await self.llm_service.close()
+
+def get_services(request: Request) -> ServiceContainer:
+    """FastAPI dependency returning the container created in the app lifespan"""
+    return request.app.state.services
@@ -0,0 +1,84 @@
+"""Measure the cold import cost of app.main against a budget.
+
+Usage:
+    python -m benchmarks.import_time --runs 5 --budget-ms 1500
+
+Each run imports app.main in a fresh interpreter with `python -X importtime`,
+so nothing is shared between runs except the OS file cache. Reports the
+median cumulative import time of app.main, the slowest modules of the last
+run, and whether any dependency that should load lazily (on first use,
+inside the service that needs it) was imported. Exits non-zero if the
+median exceeds the budget or a lazy dependency was imported.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold import budget for app.main; FastAPI and SQLAlchemy alone take most of it
+DEFAULT_BUDGET_MS = 1500
+
+# Heavy dependencies that must only be imported when first used
+LAZY_MODULES = ["chromadb", "groq", "httpx", "aiohttp", "uvicorn"]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_once(module: str):
+    """Import module in a fresh interpreter; returns ({module: (self_us, cumulative_us)}, loaded lazy modules)"""
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return timings, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        timings, loaded = import_once(args.module)
+        totals.append(timings[args.module][1] / 1000)
+
+    print("Slowest imports (cumulative ms, last run):")
+    slowest = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {cumulative_us / 1000:8.1f}  (self {self_us / 1000:6.1f})  {name}")
+
+    median = statistics.median(totals)
+    print(f"\n{args.module}: median {median:.0f}ms, min {min(totals):.0f}ms, max {max(totals):.0f}ms over {args.runs} runs")
+    print(f"Budget: {args.budget_ms:.0f}ms")
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"❌ Over budget by {median - args.budget_ms:.0f}ms")
+        failed = True
+    if loaded:
+        print(f"❌ Imported eagerly: {', '.join(loaded)}")
+        failed = True
+    if not failed:
+        print("✅ Within budget")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
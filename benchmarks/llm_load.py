@@ -0,0 +1,57 @@
+"""Load-test LLMService concurrency against the network-free local backend.
+
+Usage:
+    python -m benchmarks.llm_load --requests 100 --concurrency 8 --latency 0.2
+
+Fires `--requests` concurrent generate_response calls and, alongside them,
+measures how late a 10ms heartbeat timer fires. A non-blocking backend keeps
+the heartbeat lag near zero while completions are in flight.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("LLM_BACKEND", "local")
+
+from app.ai.llm import LLMService, LocalBackend
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+async def run(requests: int, concurrency: int, latency: float):
+    service = LLMService(
+        backend=LocalBackend(latency_seconds=latency),
+        max_concurrency=concurrency
+    )
+    stop = asyncio.Event()
+    lags = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        service.generate_response([{"role": "user", "content": f"request {i}"}])
+        for i in range(requests)
+    ])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    await service.close()
+
+    expected = latency * -(-requests // concurrency)
+    print(f"Completions:         {service.backend.calls}")
+    print(f"Wall time:           {elapsed:.2f}s (ideal {expected:.2f}s)")
+    print(f"Throughput:          {requests / elapsed:.1f} req/s")
+    print(f"Max event loop lag:  {max(lags) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.latency))
@@ -0,0 +1,106 @@
+"""Benchmark filtered /api/programs list queries against a large Program table.
+
+Usage:
+    python -m benchmarks.program_queries --rows 100000
+
+Builds a throwaway SQLite database, fills it with synthetic programs and
+times the keyset-paginated queries issued by GET /api/programs/ with the
+migration-managed indexes, then again with the secondary indexes dropped.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select
+
+from app.database import Base
+from app.migrations import run_migrations
+from app.models.program import Program
+
+UNIVERSITIES = [f"University {i}" for i in range(500)]
+DEGREE_TYPES = ["Master's Degree", "Doctoral Degree", "Graduate Certificate"]
+
+QUERIES = {
+    "university": lambda q: q.where(Program.university == "University 42"),
+    "degree_type": lambda q: q.where(Program.degree_type == "Graduate Certificate"),
+    "degree_type + funding": lambda q: q.where(
+        Program.degree_type == "Doctoral Degree", Program.funding_available.is_(True)
+    ),
+    "degree_type + funding + tuition": lambda q: q.where(
+        Program.degree_type == "Master's Degree",
+        Program.funding_available.is_(False),
+        Program.tuition.between(20000, 30000)
+    ),
+    "tuition range, deep page": lambda q: q.where(
+        Program.tuition <= 15000, Program.id > "program_090000"
+    ),
+}
+
+def populate(engine, rows: int):
+    now = datetime.utcnow()
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            batch.append({
+                "id": f"program_{i:06d}",
+                "name": f"Computer Science {i}",
+                "university": random.choice(UNIVERSITIES),
+                "department": "Computer Science",
+                "degree_type": random.choice(DEGREE_TYPES),
+                "description": "Synthetic program " * 10,
+                "requirements": {"gre": False},
+                "research_areas": ["Machine Learning", "Systems"],
+                "tuition": random.uniform(0, 60000),
+                "funding_available": random.random() < 0.3,
+                "created_at": now,
+                "updated_at": now,
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(Program), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Program), batch)
+
+def time_queries(engine, repeats: int):
+    results = {}
+    columns = [Program.id, Program.name, Program.university, Program.tuition]
+    with engine.connect() as conn:
+        for label, apply_filter in QUERIES.items():
+            query = apply_filter(select(*columns)).order_by(Program.id).limit(11)
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                conn.execute(query).all()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[label] = statistics.median(timings)
+    return results
+
+def main(rows: int, repeats: int):
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine, tables=[Program.__table__])
+        run_migrations(engine)
+        print(f"Inserting {rows} programs...")
+        populate(engine, rows)
+
+        indexed = time_queries(engine, repeats)
+        for index in Program.__table__.indexes:
+            index.drop(engine)
+        unindexed = time_queries(engine, repeats)
+        engine.dispose()
+
+    print(f"\n{'query':35} {'indexed':>10} {'no index':>10}")
+    for label in QUERIES:
+        print(f"{label:35} {indexed[label]:>8.2f}ms {unindexed[label]:>8.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.repeats)
@@ -0,0 +1,89 @@
+"""Benchmark concurrent SQLite reads and writes with default vs. tuned pragmas.
+
+Usage:
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 --seconds 5
+
+Runs reader threads (indexed point lookups) alongside writer threads
+(single-row insert + commit, as the program routes do) against a throwaway
+database, once with SQLite's defaults (rollback journal, synchronous=FULL)
+and once with the pragmas create_db_engine applies from Settings.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.database import create_db_engine, sqlite_pragmas
+
+def run(engine, readers: int, writers: int, seconds: float):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, payload TEXT)"))
+        conn.execute(
+            text("INSERT INTO items (payload) VALUES (:payload)"),
+            [{"payload": "x" * 200} for _ in range(10000)]
+        )
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader():
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(
+                        text("SELECT payload FROM items WHERE id = :id"),
+                        {"id": random.randint(1, 10000)}
+                    ).fetchone()
+                done += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts["reads"] += done
+            counts["errors"] += errors
+
+    def writer():
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("INSERT INTO items (payload) VALUES (:payload)"), {"payload": "y" * 200})
+                done += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return {key: value / seconds if key != "errors" else value for key, value in counts.items()}
+
+def main(readers: int, writers: int, seconds: float):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, pragmas in [("default", {}), ("tuned", sqlite_pragmas())]:
+            url = f"sqlite:///{os.path.join(tmp, label + '.db')}"
+            results[label] = run(create_db_engine(url, pragmas=pragmas), readers, writers, seconds)
+
+    print(f"{'engine':10} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+    for label, result in results.items():
+        print(f"{label:10} {result['reads']:>10.0f} {result['writes']:>10.0f} {result['errors']:>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    main(args.readers, args.writers, args.seconds)